@@ -11,6 +11,9 @@ from typing import Optional
 
 from .core import find_marketplace_path, find_plugin_in_marketplace, MARKETPLACES_DIR
 
+# Closing delimiter of YAML frontmatter
+_FRONTMATTER_END_RE = re.compile(r"\n---\s*\n")
+
 
 @dataclass
 class CheckoutResult:
@@ -155,7 +158,7 @@ def checkout_skill(
             if skill_path.suffix == ".md":
                 content = skill_path.read_text(encoding="utf-8", errors="replace")
                 if content.startswith("---"):
-                    end_match = re.search(r"\n---\s*\n", content[3:])
+                    end_match = _FRONTMATTER_END_RE.search(content[3:])
                     if end_match:
                         try:
                             metadata = yaml.safe_load(content[3:3 + end_match.start()]) or {}
@@ -199,7 +202,7 @@ def checkout_skill(
             if skill_md.exists():
                 content = skill_md.read_text(encoding="utf-8", errors="replace")
                 if content.startswith("---"):
-                    end_match = re.search(r"\n---\s*\n", content[3:])
+                    end_match = _FRONTMATTER_END_RE.search(content[3:])
                     if end_match:
                         try:
                             metadata = yaml.safe_load(content[3:3 + end_match.start()]) or {}
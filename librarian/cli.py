@@ -11,8 +11,8 @@ from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
 import yaml
-from datasketch import MinHashLSH
 
 from .core import (
     MARKETPLACES_DIR,
@@ -26,7 +26,13 @@ from .core import (
     scan_directory_for_content,
     find_marketplace_path,
     find_plugin_in_marketplace,
+    iter_markdown_files,
     check_similarity_sanity,
+    create_lsh_index,
+    dumps_json,
+    read_json,
+    signature_matrix,
+    write_json,
 )
 from .cmd_checkout import cmd_checkout
 
@@ -80,6 +86,10 @@ class SkillInfo:
 DATA_DIR = Path.home() / ".librarian"
 SIMILARITY_REPORT = DATA_DIR / "similarity_report.json"
 CAPABILITY_INDEX = DATA_DIR / "capability_index.json"
+SIGNATURE_CACHE = DATA_DIR / "signature_cache.npz"
+
+# Closing delimiter of YAML frontmatter
+_FRONTMATTER_END_RE = re.compile(r"\n---\s*\n")
 
 
 def ensure_data_dir():
@@ -102,8 +112,7 @@ class LocationIndex:
         self.total_clusters = 0
 
     def build_from_report(self, report_path: Path) -> None:
-        with open(report_path) as fh:
-            report = json.load(fh)
+        report = read_json(report_path)
 
         # Handle both old and new JSON formats
         if "metadata" in report:
@@ -124,10 +133,12 @@ class LocationIndex:
                 # Old format doesn't have cluster_id, use array index
                 cluster_id = idx
 
+            # Marketplace and plugin names repeat across thousands of
+            # locations; intern them so each name is stored once
             locations = [
                 Location(
-                    marketplace=loc["marketplace"],
-                    plugin=loc["plugin"],
+                    marketplace=sys.intern(loc["marketplace"]),
+                    plugin=sys.intern(loc["plugin"]),
                     path=loc["path"],
                     is_official=loc["is_official"],
                 )
@@ -177,15 +188,17 @@ class LocationIndex:
             return results
 
         # Try pattern match
+        seen = set()
         for filename, cids in self.by_filename.items():
             if fnmatch.fnmatch(filename, query) or fnmatch.fnmatch(filename, f"*{query}*"):
                 for cid in cids:
-                    if cid not in [r[0].cluster_id for r in results]:
+                    if cid not in seen:
                         cluster = self.clusters[cid]
                         matching = [loc for loc in cluster.locations
                                    if fnmatch.fnmatch(loc.filename, query) or query.lower() in loc.filename.lower()]
                         if matching:
                             results.append((cluster, matching))
+                            seen.add(cid)
 
         return results
 
@@ -261,16 +274,16 @@ def cmd_compare_marketplaces(args):
 
     # Build LSH index for marketplace A (only files with minhash)
     print("Building LSH index for marketplace A...")
-    lsh = MinHashLSH(threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM)
+    lsh = create_lsh_index()
 
-    fingerprints_a = {}
     files_a_with_minhash = 0
-    for i, f in enumerate(files_a):
-        if f.minhash:
-            key = f"a_{i}"
-            lsh.insert(key, f.minhash)
-            fingerprints_a[key] = f
-            files_a_with_minhash += 1
+    first_a_by_content = {}
+    with lsh.insertion_session() as session:
+        for i, f in enumerate(files_a):
+            if f.minhash:
+                session.insert(i, f.minhash, check_duplication=False)
+                first_a_by_content.setdefault(f.content, i)
+                files_a_with_minhash += 1
 
     # Query with marketplace B to find overlaps (only files with minhash)
     files_b_with_minhash = sum(1 for f in files_b if f.minhash)
@@ -278,42 +291,52 @@ def cmd_compare_marketplaces(args):
     print(f"Indexable files: {files_a_with_minhash} in {marketplace_a}, {files_b_with_minhash} in {marketplace_b}")
     print("Finding overlaps...")
 
+    # Candidates of each B file are scored in one comparison against these rows
+    hashes_a = signature_matrix(files_a)
+
     shared_b_indices = set()
-    shared_a_keys = set()
+    shared_a_indices = set()
     overlap_pairs = []
 
     for j, f_b in enumerate(files_b):
         if f_b.minhash is None:
             continue
 
+        # Exact copies are the common case between marketplaces; their best
+        # match is the first identical file in A, with no LSH query needed
+        identical = first_a_by_content.get(f_b.content)
+        if identical is not None:
+            shared_b_indices.add(j)
+            shared_a_indices.add(identical)
+            overlap_pairs.append({
+                "file_a": files_a[identical].relative_path,
+                "file_b": f_b.relative_path,
+                "similarity": 1.0,
+            })
+            continue
+
         matches = lsh.query(f_b.minhash)
 
         if matches:
             # Found overlap
             shared_b_indices.add(j)
 
-            # Calculate best match from A
-            best_sim = 0.0
-            best_match_key = None
-
-            for match_key in matches:
-                if match_key in fingerprints_a:
-                    f_a = fingerprints_a[match_key]
-                    sim = f_b.minhash.jaccard(f_a.minhash)
-                    if sim > best_sim:
-                        best_sim = sim
-                        best_match_key = match_key
-
-            if best_match_key:
-                shared_a_keys.add(best_match_key)
+            # Best match from A; ties go to the earliest file
+            candidates = sorted(matches)
+            agreeing = np.count_nonzero(hashes_a[candidates] == f_b.minhash.hashvalues, axis=1)
+            best = int(agreeing.argmax())
+
+            if agreeing[best]:
+                best_match = candidates[best]
+                shared_a_indices.add(best_match)
                 overlap_pairs.append({
-                    "file_a": fingerprints_a[best_match_key].relative_path,
+                    "file_a": files_a[best_match].relative_path,
                     "file_b": f_b.relative_path,
-                    "similarity": round(best_sim, 3),
+                    "similarity": round(int(agreeing[best]) / NUM_PERM, 3),
                 })
 
     # Compute set statistics (only counting files with minhash)
-    a_only_count = files_a_with_minhash - len(shared_a_keys)
+    a_only_count = files_a_with_minhash - len(shared_a_indices)
     b_only_count = files_b_with_minhash - len(shared_b_indices)
     shared_count = len(shared_b_indices)
 
@@ -402,7 +425,7 @@ def cmd_compare_marketplaces(args):
             },
             "top_overlaps": overlap_pairs[:top_n],
         }
-        print(json.dumps(json_output, indent=2))
+        print(dumps_json(json_output))
 
 
 # ============================================================================
@@ -445,10 +468,11 @@ def cmd_compare(args):
         print(f"No files found in baseline: {baseline_spec}")
         sys.exit(1)
 
-    lsh = MinHashLSH(threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM)
-    for i, f in enumerate(baseline_files):
-        if f.minhash:
-            lsh.insert(str(i), f.minhash)
+    lsh = create_lsh_index()
+    with lsh.insertion_session() as session:
+        for i, f in enumerate(baseline_files):
+            if f.minhash:
+                session.insert(str(i), f.minhash, check_duplication=False)
 
     print(f"Indexed {len(baseline_files)} files from {baseline_spec}.\n")
 
@@ -503,9 +527,8 @@ def cmd_compare(args):
     total_clusters = 0
     if SIMILARITY_REPORT.exists():
         try:
-            with open(SIMILARITY_REPORT) as fh:
-                report = json.load(fh)
-                total_clusters = report.get("summary", {}).get("unique_clusters", 0)
+            report = read_json(SIMILARITY_REPORT)
+            total_clusters = report.get("summary", {}).get("unique_clusters", 0)
         except (json.JSONDecodeError, KeyError):
             # Report may be missing, malformed, or lack expected fields
             pass
@@ -608,10 +631,11 @@ def cmd_impact(args):
         print(f"Error: {e}")
         sys.exit(1)
 
-    lsh = MinHashLSH(threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM)
-    for i, f in enumerate(baseline_files):
-        if f.minhash:
-            lsh.insert(str(i), f.minhash)
+    lsh = create_lsh_index()
+    with lsh.insertion_session() as session:
+        for i, f in enumerate(baseline_files):
+            if f.minhash:
+                session.insert(str(i), f.minhash, check_duplication=False)
 
     target_files = scan_directory_for_content(target_path, target_name)
 
@@ -684,7 +708,7 @@ def parse_frontmatter(content: str) -> dict:
     """Parse YAML frontmatter from markdown."""
     if not content.startswith("---"):
         return {}
-    end_match = re.search(r"\n---\s*\n", content[3:])
+    end_match = _FRONTMATTER_END_RE.search(content[3:])
     if not end_match:
         return {}
     try:
@@ -698,10 +722,7 @@ def scan_capabilities(marketplace_path: Path) -> list[Capability]:
     capabilities = []
     marketplace_name = marketplace_path.name
 
-    for md_file in marketplace_path.rglob("*.md"):
-        if "backup" in str(md_file).lower():
-            continue
-
+    for md_file in iter_markdown_files(marketplace_path):
         parts = md_file.parts
         if "skills" in parts:
             kind = "skill"
@@ -731,7 +752,7 @@ def scan_capabilities(marketplace_path: Path) -> list[Capability]:
         if not description:
             content_body = content
             if content.startswith("---"):
-                end_match = re.search(r"\n---\s*\n", content[3:])
+                end_match = _FRONTMATTER_END_RE.search(content[3:])
                 if end_match:
                     content_body = content[3 + end_match.end():]
             for line in content_body.split("\n"):
@@ -803,8 +824,7 @@ def save_capability_index(capabilities: list[Capability]) -> None:
         }
     }
 
-    with open(CAPABILITY_INDEX, "w") as fh:
-        json.dump(index_data, fh, indent=2)
+    write_json(CAPABILITY_INDEX, index_data)
 
 
 def load_capability_index() -> list[Capability]:
@@ -817,8 +837,7 @@ def load_capability_index() -> list[Capability]:
         return []
 
     try:
-        with open(CAPABILITY_INDEX) as fh:
-            index_data = json.load(fh)
+        index_data = read_json(CAPABILITY_INDEX)
 
         capabilities = []
         for cap_data in index_data.get("capabilities", []):
@@ -926,14 +945,24 @@ def cmd_stats(args):
 # MARKETPLACE-LEVEL command: Aggregate similarity at marketplace level
 # ============================================================================
 
+def _popcount_rows(words: np.ndarray) -> np.ndarray:
+    """Count set bits in each row of a 2-D uint64 array.
+
+    Uses np.bitwise_count (NumPy 2.0+) and falls back to unpacking bytes
+    on older NumPy.
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=1, dtype=np.int64)
+    return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
 def cmd_marketplace_level(args):
     """Compute marketplace-level similarity matrix."""
     if not SIMILARITY_REPORT.exists():
         print(f"Error: Index not found. Run 'librarian scan' first.")
         sys.exit(1)
 
-    with open(SIMILARITY_REPORT) as fh:
-        report = json.load(fh)
+    report = read_json(SIMILARITY_REPORT)
 
     # Build marketplace -> files mapping from file_index
     mp_files = defaultdict(set)
@@ -973,31 +1002,58 @@ def cmd_marketplace_level(args):
     print(file=progress_out)
 
     # Compute pairwise similarity matrix
-    # Using Jaccard similarity on shared clusters
-    matrix = {}
-    for i, mp_a in enumerate(marketplaces):
-        matrix[mp_a] = {}
-        clusters_a = mp_clusters[mp_a]
-        for j, mp_b in enumerate(marketplaces):
-            clusters_b = mp_clusters[mp_b]
-            intersection = len(clusters_a & clusters_b)
-            union = len(clusters_a | clusters_b)
-            if union > 0:
-                jaccard = intersection / union
-            else:
-                jaccard = 0.0
-            matrix[mp_a][mp_b] = round(jaccard, 3)
-
-    # Find top similar pairs (excluding self-comparisons)
-    pairs = []
-    for i, mp_a in enumerate(marketplaces):
-        for j, mp_b in enumerate(marketplaces):
-            if i < j:  # Upper triangle only
-                sim = matrix[mp_a][mp_b]
-                if sim > 0:
-                    pairs.append((mp_a, mp_b, sim))
+    # Using Jaccard similarity on shared clusters, with cluster membership
+    # packed into uint64 bitboards (one bit per cluster)
+    column_of = {}
+    rows, cols = [], []
+    for i, mp in enumerate(marketplaces):
+        for cluster_id in mp_clusters[mp]:
+            rows.append(i)
+            cols.append(column_of.setdefault(cluster_id, len(column_of)))
+    cols = np.asarray(cols, dtype=np.uint64)
+    bitboards = np.zeros((n, (len(column_of) + 63) // 64), dtype=np.uint64)
+    np.bitwise_or.at(
+        bitboards,
+        (np.asarray(rows, dtype=np.intp), (cols >> np.uint64(6)).astype(np.intp)),
+        np.uint64(1) << (cols & np.uint64(63)),
+    )
 
-    pairs.sort(key=lambda x: x[2], reverse=True)
+    # Jaccard is symmetric, so only pairs above the diagonal are counted and
+    # then mirrored; the diagonal is each marketplace's own cluster count.
+    sizes = _popcount_rows(bitboards)
+    intersections = np.diag(sizes)
+    for i in range(n - 1):
+        row = _popcount_rows(bitboards[i] & bitboards[i + 1:])
+        intersections[i, i + 1:] = row
+        intersections[i + 1:, i] = row
+    unions = sizes[:, None] + sizes[None, :] - intersections
+    jaccard = intersections / np.maximum(unions, 1)
+
+    rounded = [[round(sim, 3) for sim in row] for row in jaccard.tolist()]
+    matrix = {
+        mp_a: dict(zip(marketplaces, row))
+        for mp_a, row in zip(marketplaces, rounded)
+    }
+
+    # Find top similar pairs (excluding self-comparisons). Pairs tied with
+    # the cutoff are kept, so the order matches a full stable sort.
+    top_pairs_limit = 20
+    upper_a, upper_b = np.triu_indices(n, k=1)
+    scores = np.array(rounded, dtype=np.float64).reshape(n, n)[upper_a, upper_b]
+    overlapping = scores > 0
+    pair_count = int(np.count_nonzero(overlapping))
+    if pair_count > top_pairs_limit:
+        kth = scores.size - top_pairs_limit
+        cutoff = np.partition(scores, kth)[kth]
+        overlapping &= scores >= cutoff
+    candidates = np.flatnonzero(overlapping)
+    top = candidates[np.argsort(-scores[candidates], kind="stable")][:top_pairs_limit]
+    pairs = [
+        (marketplaces[a], marketplaces[b], sim)
+        for a, b, sim in zip(
+            upper_a[top].tolist(), upper_b[top].tolist(), scores[top].tolist()
+        )
+    ]
 
     if getattr(args, 'json', False):
         json_output = {
@@ -1007,10 +1063,10 @@ def cmd_marketplace_level(args):
             "similarity_matrix": matrix,
             "top_pairs": [
                 {"marketplace_a": a, "marketplace_b": b, "similarity": s}
-                for a, b, s in pairs[:20]
+                for a, b, s in pairs
             ],
         }
-        print(json.dumps(json_output, indent=2))
+        print(dumps_json(json_output))
         return
 
     # Text output
@@ -1036,8 +1092,8 @@ def cmd_marketplace_level(args):
         for mp_a, mp_b, sim in pairs[:15]:
             bar = "█" * int(sim * 20)
             print(f"  {mp_a[:20]:<20} ↔ {mp_b[:20]:<20} {sim*100:>5.1f}% {bar}")
-        if len(pairs) > 15:
-            print(f"  ... and {len(pairs) - 15} more pairs with overlap")
+        if pair_count > 15:
+            print(f"  ... and {pair_count - 15} more pairs with overlap")
     else:
         print("No marketplace pairs share clusters (all disjoint).")
     print()
@@ -1185,6 +1241,32 @@ def find_skill_file(spec: str) -> tuple[Path, str, str] | None:
         return None
 
 
+# Tool names to look for (as word boundaries), compiled once at import
+_TOOL_PATTERNS = [
+    (tool_name, re.compile(rf'\b{re.escape(tool_name)}\b', re.IGNORECASE))
+    for tool_name in [
+        'Bash', 'Read', 'Write', 'Edit', 'Glob',
+        'Grep', 'Task', 'WebFetch', 'WebSearch',
+        'TodoWrite', 'AskUserQuestion', 'MCP', 'mcp-cli',
+    ]
+]
+
+# Trigger phrases from "Use this skill when" patterns
+_TRIGGER_PATTERNS = [
+    re.compile(r'[Uu]se this (?:skill|agent) when[^.]*\.'),
+    re.compile(r'[Tt]rigger(?:s|ed)? (?:by|when|with)[^.]*\.'),
+    re.compile(r'[Uu]se for[^.]*\.'),
+]
+
+# Dependency indicators
+_DEPENDENCY_PATTERNS = [
+    re.compile(r'[Rr]equires? ([a-zA-Z0-9_-]+)'),
+    re.compile(r'[Dd]epends? on ([a-zA-Z0-9_-]+)'),
+    re.compile(r'[Nn]eeds? ([a-zA-Z0-9_-]+)'),
+]
+_DEPENDENCY_STOPWORDS = frozenset(['the', 'a', 'an', 'to', 'be'])
+
+
 def analyze_skill_content(content: str) -> dict:
     """Analyze skill content for complexity indicators.
 
@@ -1194,42 +1276,21 @@ def analyze_skill_content(content: str) -> dict:
         - triggers: list of trigger phrases
         - complexity_score: low/medium/high
     """
-    # Tool names to look for (as word boundaries)
-    tool_names = [
-        'Bash', 'Read', 'Write', 'Edit', 'Glob',
-        'Grep', 'Task', 'WebFetch', 'WebSearch',
-        'TodoWrite', 'AskUserQuestion', 'MCP', 'mcp-cli',
+    tools_found = [
+        tool_name for tool_name, pattern in _TOOL_PATTERNS
+        if pattern.search(content)
     ]
-    tools_found = []
-    for tool_name in tool_names:
-        # Build word-boundary pattern for each tool
-        pattern = rf'\b{re.escape(tool_name)}\b'
-        if re.search(pattern, content, re.IGNORECASE):
-            if tool_name not in tools_found:
-                tools_found.append(tool_name)
-
-    # Extract trigger phrases from "Use this skill when" patterns
+
     triggers = []
-    trigger_patterns = [
-        r'[Uu]se this (?:skill|agent) when[^.]*\.',
-        r'[Tt]rigger(?:s|ed)? (?:by|when|with)[^.]*\.',
-        r'[Uu]se for[^.]*\.',
-    ]
-    for pattern in trigger_patterns:
-        matches = re.findall(pattern, content)
+    for pattern in _TRIGGER_PATTERNS:
+        matches = pattern.findall(content)
         triggers.extend(matches[:3])  # Limit to 3 per pattern
 
-    # Look for dependency indicators
     dependencies = []
-    dep_patterns = [
-        r'[Rr]equires? ([a-zA-Z0-9_-]+)',
-        r'[Dd]epends? on ([a-zA-Z0-9_-]+)',
-        r'[Nn]eeds? ([a-zA-Z0-9_-]+)',
-    ]
-    for pattern in dep_patterns:
-        matches = re.findall(pattern, content)
+    for pattern in _DEPENDENCY_PATTERNS:
+        matches = pattern.findall(content)
         for match in matches[:5]:
-            if match.lower() not in ['the', 'a', 'an', 'to', 'be']:
+            if match.lower() not in _DEPENDENCY_STOPWORDS:
                 dependencies.append(match)
 
     # Calculate complexity score
@@ -1277,7 +1338,7 @@ def parse_skill_file(file_path: Path, marketplace: str, plugin: str) -> SkillInf
         # Try to extract from content
         body = content
         if content.startswith("---"):
-            end_match = re.search(r"\n---\s*\n", content[3:])
+            end_match = _FRONTMATTER_END_RE.search(content[3:])
             if end_match:
                 body = content[3 + end_match.end():]
 
@@ -1381,70 +1442,27 @@ def cmd_describe(args):
 def cmd_scan(args):
     """Scan marketplaces and build similarity index."""
     from datetime import datetime, timezone
-    from datasketch import MinHash, MinHashLSH
-    from .core import tokenize, compute_minhash, FileInfo
+    from .core import build_lsh_index, find_clusters, find_content_files
 
     ensure_data_dir()
 
     print(f"Scanning marketplaces in {MARKETPLACES_DIR}...")
     print(f"Similarity threshold: {SIMILARITY_THRESHOLD * 100:.0f}%\n")
 
-    files = []
-    for mp in sorted(MARKETPLACES_DIR.iterdir()):
-        if not mp.is_dir() or mp.name.startswith("."):
-            continue
-
-        for md_file in mp.rglob("*.md"):
-            if "backup" in str(md_file).lower():
-                continue
-
-            rel_to_mp = md_file.relative_to(mp)
-            parts = rel_to_mp.parts
-
-            plugin = "root"
-            if "plugins" in parts:
-                idx = parts.index("plugins")
-                if idx + 1 < len(parts):
-                    plugin = parts[idx + 1]
-            elif len(parts) > 1:
-                plugin = parts[0]
-
-            try:
-                content = md_file.read_text(encoding="utf-8", errors="replace")
-                if len(content) < 100:
-                    continue
-
-                files.append(FileInfo(
-                    marketplace=mp.name,
-                    plugin=plugin,
-                    relative_path=str(rel_to_mp),
-                    full_path=str(md_file),
-                    content=content,
-                ))
-            except Exception:
-                pass
+    files = find_content_files(MARKETPLACES_DIR)
 
     print(f"Found {len(files)} content files (>100 chars)")
 
     print("Building MinHash signatures...")
-    lsh = MinHashLSH(threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM)
+    lsh, empty_shingles = build_lsh_index(files, cache_path=SIGNATURE_CACHE)
+    files_skipped = len(empty_shingles)
 
-    # Track diagnostic info
-    files_indexed = 0
-    files_skipped = 0
-    empty_shingles = []
+    # Content is only needed for hashing; release it before clustering so
+    # peak memory doesn't scale with total markdown size
+    for f in files:
+        f.content = ""
 
-    for i, f in enumerate(files):
-        shingles = tokenize(f.content)
-        if shingles:
-            f.minhash = compute_minhash(shingles)
-            lsh.insert(str(i), f.minhash)
-            files_indexed += 1
-        else:
-            files_skipped += 1
-            empty_shingles.append(f"{f.marketplace}/{f.plugin}/{f.relative_path}")
-
-    print(f"Indexed {files_indexed} files into LSH")
+    print(f"Indexed {len(files) - files_skipped} files into LSH")
     if files_skipped > 0:
         print(f"Skipped {files_skipped} files with empty shingles")
         if files_skipped <= 10:
@@ -1452,111 +1470,36 @@ def cmd_scan(args):
                 print(f"  - {path}")
 
     print("Finding similarity clusters...")
-    assigned = set()
-    clusters = []
+    clusters, file_to_cluster = find_clusters(files, lsh)
 
     # DESIGN RATIONALE: Build indices for fast lookups
     # These indices enable O(1) lookups by marketplace and filename
     # instead of scanning the entire cluster array
     file_index = []  # Array of all files with their cluster membership
-    marketplace_index = defaultdict(list)  # marketplace -> list of cluster IDs
-    filename_index = defaultdict(list)  # filename -> list of cluster IDs
-
-    # Build cluster membership map
-    file_to_cluster = {}  # file_index -> cluster_id
-
-    for i, f in enumerate(files):
-        if i in assigned or f.minhash is None:
-            continue
+    marketplace_index = defaultdict(set)  # marketplace -> cluster IDs
+    filename_index = defaultdict(set)  # filename -> cluster IDs
 
-        result = lsh.query(f.minhash)
-        similar_indices = [int(r) for r in result]
-
-        if len(similar_indices) > 1:
-            cluster_id = len(clusters)
-            # Filter both indices and files together to maintain alignment
-            filtered = [(j, files[j]) for j in similar_indices if files[j].minhash is not None]
-            similar_indices = [pair[0] for pair in filtered]
-            cluster_files = [pair[1] for pair in filtered]
-
-            # Calculate pairwise similarities for similarity matrix
-            similarities = []
-            similarity_pairs = []
-            for j, f1 in enumerate(cluster_files):
-                for k, f2 in enumerate(cluster_files[j+1:], start=j+1):
-                    sim = f1.minhash.jaccard(f2.minhash)
-                    similarities.append(sim)
-                    # Store file indices for similarity matrix
-                    idx1 = similar_indices[j]
-                    idx2 = similar_indices[k]
-                    similarity_pairs.append({
-                        "file1_index": idx1,
-                        "file2_index": idx2,
-                        "similarity": round(sim, 3),
-                    })
-
-            avg_sim = sum(similarities) / len(similarities) if similarities else 0
-
-            marketplaces = set(f.marketplace for f in cluster_files)
-            is_internal = len(marketplaces) == 1
-            is_scaffold = is_internal and len(cluster_files) >= 5 and avg_sim >= 0.98
-
-            if is_scaffold:
-                cluster_type = "scaffold"
-            elif is_internal:
-                cluster_type = "internal"
-            else:
-                cluster_type = "cross-marketplace"
-
-            # Build location list with file indices
-            locations = []
-            for idx, f in zip(similar_indices, cluster_files):
-                locations.append({
-                    "file_index": idx,
-                    "marketplace": f.marketplace,
-                    "plugin": f.plugin,
-                    "path": f.relative_path,
-                    "is_official": f.is_official,
-                })
-                # Update indices
-                file_to_cluster[idx] = cluster_id
-                marketplace_index[f.marketplace].append(cluster_id)
-                filename_index[Path(f.relative_path).name].append(cluster_id)
-
-            clusters.append({
-                "cluster_id": cluster_id,
-                "type": cluster_type,
-                "size": len(cluster_files),
-                "avg_similarity": round(avg_sim, 3),
-                "has_official": any(f.is_official for f in cluster_files),
-                "marketplaces": sorted(marketplaces),
-                "locations": locations,
-                "similarity_pairs": similarity_pairs,
-            })
-
-            assigned.update(similar_indices)
-
-    clusters.sort(key=lambda c: c["size"], reverse=True)
-
-    # Build file index with cluster membership
+    # One pass over files builds all three: cluster locations are exactly
+    # the files in file_to_cluster
     for i, f in enumerate(files):
-        file_entry = {
+        cluster_id = file_to_cluster.get(i)
+        filename = f.filename
+        file_index.append({
             "file_index": i,
             "marketplace": f.marketplace,
             "plugin": f.plugin,
             "path": f.relative_path,
-            "filename": Path(f.relative_path).name,
+            "filename": filename,
             "is_official": f.is_official,
-            "cluster_id": file_to_cluster.get(i, None),
-            "in_cluster": i in file_to_cluster,
-        }
-        file_index.append(file_entry)
+            "cluster_id": cluster_id,
+            "in_cluster": cluster_id is not None,
+        })
+        if cluster_id is not None:
+            marketplace_index[f.marketplace].add(cluster_id)
+            filename_index[filename].add(cluster_id)
 
-    # Deduplicate marketplace and filename indices
-    for mp in marketplace_index:
-        marketplace_index[mp] = sorted(list(set(marketplace_index[mp])))
-    for fn in filename_index:
-        filename_index[fn] = sorted(list(set(filename_index[fn])))
+    marketplace_index = {mp: sorted(ids) for mp, ids in marketplace_index.items()}
+    filename_index = {fn: sorted(ids) for fn, ids in filename_index.items()}
 
     by_type = defaultdict(list)
     for c in clusters:
@@ -1606,13 +1549,12 @@ def cmd_scan(args):
             },
         },
         "file_index": file_index,
-        "marketplace_index": dict(marketplace_index),
-        "filename_index": dict(filename_index),
+        "marketplace_index": marketplace_index,
+        "filename_index": filename_index,
         "clusters": clusters,
     }
 
-    with open(SIMILARITY_REPORT, "w") as fh:
-        json.dump(output, fh, indent=2)
+    write_json(SIMILARITY_REPORT, output)
 
     # Build capability index
     print("\nBuilding capability index...")
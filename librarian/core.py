@@ -1,14 +1,20 @@
 """Core functionality shared across librarian commands."""
 
+import functools
 import hashlib
 import json
+import multiprocessing
+import os
 import re
 import sys
+import zlib
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
+import numpy as np
 from datasketch import MinHash, MinHashLSH
 from rich.progress import (
     Progress,
@@ -20,6 +26,12 @@ from rich.progress import (
     TimeElapsedColumn,
 )
 
+# Optional: reports are written with the stdlib json module without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # Paths
 PLUGINS_DIR = Path.home() / ".claude" / "plugins"
@@ -31,8 +43,23 @@ SIMILARITY_THRESHOLD = 0.7
 NUM_PERM = 128
 SHINGLE_SIZE = 3
 
+# LSH (false positive, false negative) weights for scan. Candidates are
+# verified, so a missed pair costs more than an extra comparison.
+SCAN_LSH_WEIGHTS = (0.1, 0.9)
 
-@dataclass
+# Below this many files, starting worker processes costs more than it saves
+PARALLEL_MIN_FILES = 500
+
+# Bump when tokenize(), the shingle hash function or the MinHash seed change
+# so signatures cached by earlier versions are discarded
+SIGNATURE_VERSION = 1
+
+# ASCII bytes removed by tokenize(): everything except [a-z0-9], space and dash
+_KEPT_BYTES = frozenset(b"abcdefghijklmnopqrstuvwxyz0123456789 -")
+_DROPPED_BYTES = bytes(c for c in range(128) if c not in _KEPT_BYTES)
+
+
+@dataclass(slots=True)
 class FileInfo:
     """Information about a content file."""
     marketplace: str
@@ -41,6 +68,11 @@ class FileInfo:
     full_path: str
     content: str = ""
     minhash: MinHash = field(default=None, repr=False)
+    # Derived from marketplace once; read for every location in every cluster
+    is_official: bool = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.is_official = self.marketplace.startswith(("anthropic", "claude-plugins-official"))
 
     @property
     def location(self) -> str:
@@ -50,12 +82,8 @@ class FileInfo:
     def filename(self) -> str:
         return Path(self.relative_path).name
 
-    @property
-    def is_official(self) -> bool:
-        return self.marketplace.startswith(("anthropic", "claude-plugins-official"))
-
 
-@dataclass
+@dataclass(slots=True)
 class Location:
     """A specific file location in the ecosystem."""
     marketplace: str
@@ -72,7 +100,7 @@ class Location:
         return f"{self.marketplace}/{self.plugin}/{self.path}"
 
 
-@dataclass
+@dataclass(slots=True)
 class ClusterInfo:
     """Summary of a similarity cluster."""
     cluster_id: int
@@ -108,26 +136,35 @@ class Capability:
     def full_path(self) -> str:
         return f"{self.marketplace}/{self.plugin}/{self.path}"
 
+    @functools.cached_property
+    def _lowered(self) -> tuple[str, str, tuple[str, ...]]:
+        """Lowercased name, description and triggers, built on first match."""
+        return (
+            self.name.lower(),
+            self.description.lower(),
+            tuple(trigger.lower() for trigger in self.triggers),
+        )
+
     def matches(self, query: str) -> tuple[bool, float]:
         query_lower = query.lower()
         query_words = set(query_lower.split())
         score = 0.0
 
-        name_lower = self.name.lower()
+        # Cached on first use; capabilities are not mutated after loading
+        name_lower, desc_lower, triggers_lower = self._lowered
+
         if query_lower in name_lower:
             score += 10.0
         elif any(w in name_lower for w in query_words):
             score += 5.0
 
-        desc_lower = self.description.lower()
         if query_lower in desc_lower:
             score += 5.0
         else:
             matching_words = sum(1 for w in query_words if w in desc_lower)
             score += matching_words * 2.0
 
-        for trigger in self.triggers:
-            trigger_lower = trigger.lower()
+        for trigger_lower in triggers_lower:
             if query_lower in trigger_lower:
                 score += 3.0
             elif any(w in trigger_lower for w in query_words):
@@ -136,6 +173,19 @@ class Capability:
         return score > 0, score
 
 
+def _normalize(text: str) -> bytes:
+    """Lowercase, collapse whitespace and drop punctuation, as ASCII bytes."""
+    # Normalize: lowercase and collapse whitespace
+    text = " ".join(text.lower().split())
+
+    # DESIGN RATIONALE: Keep dashes and alphanumerics
+    # Markdown files have frontmatter (key: value), code blocks, headers (#, ##)
+    # Removing ALL punctuation was too aggressive and caused empty shingle sets
+    # Now we keep dashes (important for YAML keys, multi-word terms)
+    # Same result as re.sub(r'[^a-z0-9\s\-]', '', text) on collapsed text
+    return text.encode("ascii", "ignore").translate(None, _DROPPED_BYTES)
+
+
 def tokenize(text: str) -> set[str]:
     """Convert text to set of shingles.
 
@@ -148,18 +198,10 @@ def tokenize(text: str) -> set[str]:
     Returns:
         Set of shingles (word n-grams or character n-grams for short text)
     """
-    # Normalize: lowercase and collapse whitespace
-    text = text.lower()
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _normalize(text).decode("ascii")
 
-    # DESIGN RATIONALE: Keep dashes and alphanumerics
-    # Markdown files have frontmatter (key: value), code blocks, headers (#, ##)
-    # Removing ALL punctuation was too aggressive and caused empty shingle sets
-    # Now we keep dashes (important for YAML keys, multi-word terms)
-    text = re.sub(r'[^a-z0-9\s\-]', '', text)
-
-    # Split and filter empty strings
-    words = [w for w in text.split() if w]
+    # split() never yields empty strings, so no filtering pass is needed
+    words = text.split()
 
     # Handle short documents with fallback to character-level shingles
     if len(words) < SHINGLE_SIZE:
@@ -173,23 +215,567 @@ def tokenize(text: str) -> set[str]:
             # Last resort: return the text itself as a single shingle
             return {text} if text else set()
 
-    # Generate word-level shingles (n-grams)
-    shingles = set()
-    for i in range(len(words) - SHINGLE_SIZE + 1):
-        shingle = ' '.join(words[i:i + SHINGLE_SIZE])
-        shingles.add(shingle)
+    # Generate word-level shingles (n-grams). Zipping SHINGLE_SIZE offset
+    # views of the word list yields each window as a tuple without Python-level
+    # index arithmetic or slicing.
+    windows = zip(*(words[i:] for i in range(SHINGLE_SIZE)))
+    return set(map(" ".join, windows))
+
 
-    return shingles
+# Empty signature copied by compute_minhash(). Copying reuses the seeded
+# permutations instead of regenerating them for every file.
+# crc32: MinHash needs spread, not crypto strength.
+_EMPTY_MINHASH = MinHash(num_perm=NUM_PERM, hashfunc=zlib.crc32)
 
 
 def compute_minhash(shingles: set[str]) -> MinHash:
-    """Compute MinHash signature for shingles."""
-    m = MinHash(num_perm=NUM_PERM)
-    for s in shingles:
-        m.update(s.encode('utf-8'))
+    """Compute MinHash signature for shingles.
+
+    Scan, compare and impact hash file content through
+    compute_content_minhash(), which only comes here for documents too
+    short for word shingles.
+    """
+    m = _EMPTY_MINHASH.copy()
+    m.update_batch([s.encode('utf-8') for s in shingles])
     return m
 
 
+# Characters json.dumps escapes under its default ensure_ascii=True but
+# orjson writes raw: everything outside printable ASCII that orjson has not
+# already escaped (DEL and non-ASCII).
+_NOT_ENSURE_ASCII = re.compile("[\x7f-\U0010ffff]")
+
+
+def _ascii_escape(match: re.Match) -> str:
+    """Escape one character as json.dumps does, using surrogate pairs."""
+    code = ord(match.group())
+    if code > 0xFFFF:
+        code -= 0x10000
+        return "\\u{:04x}\\u{:04x}".format(0xD800 | code >> 10, 0xDC00 | code & 0x3FF)
+    return "\\u{:04x}".format(code)
+
+
+def _ensure_ascii(encoded: bytes) -> bytes:
+    """Escape non-ASCII characters in orjson output the way json.dumps does."""
+    if encoded.isascii() and b"\x7f" not in encoded:
+        return encoded
+    return _NOT_ENSURE_ASCII.sub(_ascii_escape, encoded.decode()).encode("ascii")
+
+
+def _orjson_indented(value, prefix: bytes) -> bytes:
+    """Serialize value with two-space indentation nested under prefix."""
+    return _ensure_ascii(orjson.dumps(
+        value, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    )).replace(b"\n", b"\n" + prefix)
+
+
+def _json_key(key) -> str:
+    """Coerce a dict key to the string json.dumps writes for it."""
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (bool, int, float)):
+        return json.dumps(key)
+    raise TypeError(
+        f"keys must be str, int, float, bool or None, not {type(key).__name__}"
+    )
+
+
+def write_json(path: Path, data) -> None:
+    """Write data to path as JSON indented by two spaces.
+
+    Uses orjson when installed, otherwise the stdlib json module. Either way
+    the file holds the same bytes as json.dump(data, fh, indent=2),
+    including \\uXXXX escapes for non-ASCII characters. With orjson,
+    top-level entries and the items of top-level lists are written one at
+    a time.
+
+    Args:
+        path: Destination file
+        data: JSON-serializable object
+    """
+    if orjson is None:
+        with open(path, "w") as fh:
+            json.dump(data, fh, indent=2)
+        return
+
+    with open(path, "wb") as fh:
+        if not isinstance(data, dict) or not data:
+            fh.write(_orjson_indented(data, b""))
+            return
+
+        fh.write(b"{")
+        for n, (key, value) in enumerate(data.items()):
+            fh.write(b"\n  " if n == 0 else b",\n  ")
+            fh.write(_ensure_ascii(orjson.dumps(_json_key(key))) + b": ")
+            if isinstance(value, list) and value:
+                fh.write(b"[")
+                for m, item in enumerate(value):
+                    fh.write(b"\n    " if m == 0 else b",\n    ")
+                    fh.write(_orjson_indented(item, b"    "))
+                fh.write(b"\n  ]")
+            else:
+                fh.write(_orjson_indented(value, b"  "))
+        fh.write(b"\n}")
+
+
+def dumps_json(data) -> str:
+    """Serialize data as JSON indented by two spaces.
+
+    Uses orjson when installed, otherwise the stdlib json module. Either way
+    the text is the same as json.dumps(data, indent=2), so non-ASCII
+    characters come out as \\uXXXX escapes and the result prints on any
+    stdout encoding.
+
+    Args:
+        data: JSON-serializable object
+
+    Returns:
+        JSON text
+    """
+    if orjson is None:
+        return json.dumps(data, indent=2)
+    return _ensure_ascii(
+        orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    ).decode("ascii")
+
+
+def read_json(path: Path):
+    """Load a JSON document from path.
+
+    Uses orjson when installed, otherwise the stdlib json module.
+
+    Args:
+        path: JSON file to read
+
+    Returns:
+        Parsed document
+
+    Raises:
+        json.JSONDecodeError: If the file is not valid JSON (orjson's decode
+            error subclasses it)
+    """
+    if orjson is None:
+        with open(path) as fh:
+            return json.load(fh)
+    return orjson.loads(Path(path).read_bytes())
+
+
+def compute_content_minhash(text: str) -> Optional[MinHash]:
+    """Compute the MinHash signature of text in a single pass.
+
+    Equivalent to compute_minhash(tokenize(text)), but word shingles are
+    built directly as the ASCII bytes that get hashed: no intermediate set
+    of str shingles and no per-shingle encode.
+
+    Args:
+        text: Input text
+
+    Returns:
+        MinHash signature, or None if the text yields no shingles
+    """
+    words = _normalize(text).split()
+
+    # Short documents use tokenize()'s word and character fallbacks
+    if len(words) < SHINGLE_SIZE:
+        shingles = tokenize(text)
+        return compute_minhash(shingles) if shingles else None
+
+    # Deduplicating is cheaper than hashing repeated shingles in numpy
+    shingles = set(map(b" ".join, zip(*(words[i:] for i in range(SHINGLE_SIZE)))))
+    m = _EMPTY_MINHASH.copy()
+    m.update_batch(list(shingles))
+    return m
+
+
+def _signature(content: str) -> Optional[MinHash]:
+    """Tokenize and hash one file's content (module level so it pickles)."""
+    return compute_content_minhash(content)
+
+
+def _content_digest(content: str) -> bytes:
+    """Return a 16-byte digest identifying file content in the signature cache."""
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+
+
+def load_signature_cache(path: Path) -> dict[bytes, np.ndarray]:
+    """Load cached MinHash hash values keyed by content digest.
+
+    Args:
+        path: Cache file written by save_signature_cache()
+
+    Returns:
+        Mapping of content digest -> hash values; empty if the file is
+        missing, unreadable, or was written with other signature parameters
+    """
+    try:
+        with np.load(path) as data:
+            if data["params"].tolist() != [SIGNATURE_VERSION, NUM_PERM, SHINGLE_SIZE]:
+                return {}
+            digests = [row.tobytes() for row in data["digests"]]
+            return dict(zip(digests, data["hashvalues"]))
+    except Exception:
+        return {}
+
+
+def save_signature_cache(path: Path, cache: dict[bytes, np.ndarray]) -> None:
+    """Atomically write cached MinHash hash values.
+
+    Args:
+        path: Destination file
+        cache: Mapping of content digest -> hash values
+    """
+    digests = np.frombuffer(b"".join(cache), dtype=np.uint8).reshape(-1, 16)
+    if cache:
+        hashvalues = np.vstack(list(cache.values()))
+    else:
+        hashvalues = np.empty((0, NUM_PERM), dtype=np.uint64)
+
+    # Write beside the destination and rename so an interrupted scan never
+    # leaves a truncated cache behind
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as fh:
+        np.savez(
+            fh,
+            params=np.array([SIGNATURE_VERSION, NUM_PERM, SHINGLE_SIZE]),
+            digests=digests,
+            hashvalues=hashvalues,
+        )
+    os.replace(tmp_path, path)
+
+
+def _compute_signatures(
+    files: list[FileInfo],
+    processes: Optional[int],
+    cache: Optional[dict[bytes, np.ndarray]] = None,
+) -> list[Optional[MinHash]]:
+    """Compute MinHash signatures for files, in order, across worker processes.
+
+    Each distinct content is hashed once and its signature is shared by
+    every file with that content, so callers must not mutate the results.
+
+    If ``cache`` (content digest -> hash values) is given, cached contents
+    are not rehashed, and the cache is updated in place to hold exactly
+    the signatures of ``files`` so entries for edited or deleted files
+    don't accumulate.
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    contents = list(dict.fromkeys(f.content for f in files))
+    by_content = {}
+    misses = contents
+
+    if cache is not None:
+        digests = {content: _content_digest(content) for content in contents}
+        misses = []
+        for content in contents:
+            hashvalues = cache.get(digests[content])
+            if hashvalues is None:
+                misses.append(content)
+            else:
+                minhash = _EMPTY_MINHASH.copy()
+                minhash.hashvalues = hashvalues
+                by_content[content] = minhash
+
+    if processes <= 1 or len(misses) < PARALLEL_MIN_FILES:
+        signatures = [_signature(content) for content in misses]
+    else:
+        chunksize = max(1, min(32, len(misses) // (processes * 4)))
+        with multiprocessing.Pool(processes) as pool:
+            signatures = list(pool.imap(_signature, misses, chunksize=chunksize))
+
+    by_content.update(zip(misses, signatures))
+
+    if cache is not None:
+        cache.clear()
+        cache.update(
+            (digests[content], minhash.hashvalues)
+            for content, minhash in by_content.items()
+            if minhash is not None
+        )
+
+    return [by_content[f.content] for f in files]
+
+
+# (bands, rows) chosen by MinHashLSH's optimizer for SIMILARITY_THRESHOLD and
+# NUM_PERM, keyed by weights. Precomputed so CLI runs never pay for the
+# integration; test_scan checks them against the optimizer.
+_PRECOMPUTED_LSH_PARAMS = {
+    (0.5, 0.5): (14, 9),
+    SCAN_LSH_WEIGHTS: (20, 6),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _lsh_params(weights: tuple[float, float]) -> tuple[int, int]:
+    if weights in _PRECOMPUTED_LSH_PARAMS:
+        return _PRECOMPUTED_LSH_PARAMS[weights]
+    lsh = MinHashLSH(threshold=SIMILARITY_THRESHOLD, num_perm=NUM_PERM, weights=weights)
+    return lsh.b, lsh.r
+
+
+def create_lsh_index(weights: tuple[float, float] = (0.5, 0.5)) -> MinHashLSH:
+    """Create an empty MinHashLSH for SIMILARITY_THRESHOLD and NUM_PERM.
+
+    The (bands, rows) split comes from _lsh_params() instead of being
+    optimized again for every index.
+
+    Args:
+        weights: (false positive, false negative) weights for the split
+
+    Returns:
+        Empty LSH index
+    """
+    return MinHashLSH(num_perm=NUM_PERM, params=_lsh_params(weights))
+
+
+def build_lsh_index(
+    files: list[FileInfo],
+    processes: Optional[int] = None,
+    cache_path: Optional[Path] = None,
+) -> tuple[MinHashLSH, list[str]]:
+    """Compute MinHash signatures for files and index them in an LSH.
+
+    Sets ``minhash`` on every file that produces shingles. Files are
+    keyed in the index by their position in ``files``; byte-identical
+    files share a signature and only the first of them is indexed.
+
+    Args:
+        files: Files with content loaded
+        processes: Worker processes for hashing (default: one per CPU);
+            small inputs are always hashed in-process
+        cache_path: Optional signature cache file; files whose content is
+            cached are not rehashed, and the cache is rewritten afterwards
+
+    Returns:
+        Tuple of (LSH index, locations of files skipped for empty shingles)
+    """
+    cache = load_signature_cache(cache_path) if cache_path else None
+    signatures = _compute_signatures(files, processes, cache)
+    if cache_path:
+        save_signature_cache(cache_path, cache)
+
+    lsh = create_lsh_index(weights=SCAN_LSH_WEIGHTS)
+    empty_shingles = []
+    indexed = set()
+
+    # Keys are unique file positions, so the per-insert duplicate check
+    # is skipped and band updates are buffered
+    with lsh.insertion_session() as session:
+        for i, (f, minhash) in enumerate(zip(files, signatures)):
+            if minhash is None:
+                empty_shingles.append(f.location)
+                continue
+
+            f.minhash = minhash
+            # Byte-identical files share one signature object; only the first
+            # is indexed and find_clusters() attaches the copies to it
+            if id(minhash) not in indexed:
+                indexed.add(id(minhash))
+                session.insert(str(i), minhash, check_duplication=False)
+
+    return lsh, empty_shingles
+
+
+# A MinHash similarity estimate is (agreeing permutations) / NUM_PERM, so
+# only NUM_PERM + 1 values can occur; the report rounds them to 3 places
+_ROUNDED_SIMILARITY = [round(count / NUM_PERM, 3) for count in range(NUM_PERM + 1)]
+
+
+def signature_matrix(files: list[FileInfo]) -> np.ndarray:
+    """Stack file signatures into one contiguous (N, NUM_PERM) array.
+
+    Row i holds the hash values of files[i]; files without a signature get
+    a row of zeros. Hash values never exceed 2**32 - 1, so they are stored
+    as uint32 to halve the footprint of datasketch's uint64 arrays.
+
+    Args:
+        files: Files indexed by build_lsh_index()
+
+    Returns:
+        uint32 array of shape (len(files), NUM_PERM)
+    """
+    hashes = np.zeros((len(files), NUM_PERM), dtype=np.uint32)
+    for i, f in enumerate(files):
+        if f.minhash is not None:
+            hashes[i] = f.minhash.hashvalues
+    return hashes
+
+
+def _mean_pairwise_agreement(hashes: np.ndarray) -> float:
+    """Mean fraction of agreeing columns over every pair of rows."""
+    k, num_perm = hashes.shape
+    if k < 2:
+        return 0.0
+
+    values = np.sort(hashes, axis=0)
+    same_as_previous = values[1:] == values[:-1]
+
+    # run[p] counts earlier rows equal to the current one in column p
+    run = np.zeros(num_perm, dtype=np.int64)
+    agreeing = 0
+    for row in same_as_previous:
+        run = (run + 1) * row
+        agreeing += int(run.sum())
+
+    return agreeing / (num_perm * k * (k - 1) / 2)
+
+
+def mean_pairwise_jaccard(minhashes: list[MinHash]) -> float:
+    """Average estimated Jaccard similarity over every pair of signatures.
+
+    Equals the mean of a.jaccard(b) over all k*(k-1)/2 pairs without
+    visiting pairs: the estimate for a pair is the fraction of permutations
+    where their hash values agree, so summing over pairs reduces to
+    counting, per permutation, the pairs that share a value. Sorting each
+    permutation column puts equal values in runs, and a run of length r
+    contributes r*(r-1)/2 agreeing pairs. Cost is O(k log k * NUM_PERM)
+    instead of O(k^2 * NUM_PERM).
+
+    Args:
+        minhashes: Signatures with the same number of permutations
+
+    Returns:
+        Mean pairwise similarity, or 0.0 for fewer than two signatures
+    """
+    if len(minhashes) < 2:
+        return 0.0
+    return _mean_pairwise_agreement(np.vstack([m.hashvalues for m in minhashes]))
+
+
+def find_clusters(files: list[FileInfo], lsh: MinHashLSH) -> tuple[list[dict], dict[int, int]]:
+    """Group files into similarity clusters using LSH candidates.
+
+    Clusters are the connected components of the similarity graph: every
+    LSH candidate pair whose estimated Jaccard similarity meets
+    SIMILARITY_THRESHOLD is an edge (LSH buckets admit false positives, so
+    candidates are verified first), and components are merged with
+    union-find. Unlike growing clusters from a single seed, this keeps
+    transitive matches together when A~B and B~C but C is not a candidate
+    of A. Members are ordered by file index so reports are reproducible.
+
+    Args:
+        files: Files indexed by build_lsh_index()
+        lsh: Index returned by build_lsh_index()
+
+    Returns:
+        Tuple of (cluster dicts in report format sorted by size,
+        mapping of file index -> cluster ID)
+    """
+    hashes = signature_matrix(files)
+
+    # Union-find over file indices. The root of each component is its
+    # smallest member, so components come out in file order.
+    parent = list(range(len(files)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    # Files sharing a signature object are byte-identical copies (see
+    # build_lsh_index()); join them to the first copy directly and only
+    # query LSH for that representative
+    representative = {}
+
+    for i, f in enumerate(files):
+        if f.minhash is None:
+            continue
+
+        first = representative.setdefault(id(f.minhash), i)
+        if first != i:
+            union(first, i)
+            continue
+
+        # Each pair is verified once, from its lower index
+        candidates = np.array(
+            [j for j in map(int, lsh.query(f.minhash)) if j > i and files[j].minhash is not None],
+            dtype=np.intp,
+        )
+        if not len(candidates):
+            continue
+
+        sims = np.count_nonzero(hashes[candidates] == hashes[i], axis=1) / NUM_PERM
+        for j in candidates[sims >= SIMILARITY_THRESHOLD].tolist():
+            union(i, j)
+
+    components = defaultdict(list)
+    for i, f in enumerate(files):
+        if f.minhash is not None:
+            components[find(i)].append(i)
+
+    clusters = []
+    file_to_cluster = {}
+
+    for similar_indices in components.values():
+        if len(similar_indices) > 1:
+            cluster_id = len(clusters)
+            cluster_files = [files[j] for j in similar_indices]
+
+            # Calculate pairwise similarities for similarity matrix. Each
+            # signature is compared against all later ones in one numpy
+            # comparison; going row by row keeps memory at O(k * NUM_PERM)
+            # rather than materializing a (k, k, NUM_PERM) array. Agreement
+            # counts index straight into the table of rounded similarities.
+            cluster_hashes = hashes[similar_indices]
+            similarity_pairs = []
+            for j, idx1 in enumerate(similar_indices[:-1]):
+                counts = np.count_nonzero(cluster_hashes[j+1:] == cluster_hashes[j], axis=1)
+                similarity_pairs.extend(
+                    {
+                        "file1_index": idx1,
+                        "file2_index": idx2,
+                        "similarity": _ROUNDED_SIMILARITY[count],
+                    }
+                    for idx2, count in zip(similar_indices[j+1:], counts.tolist())
+                )
+
+            avg_sim = _mean_pairwise_agreement(cluster_hashes)
+
+            marketplaces = set(f.marketplace for f in cluster_files)
+            is_internal = len(marketplaces) == 1
+            is_scaffold = is_internal and len(cluster_files) >= 5 and avg_sim >= 0.98
+
+            if is_scaffold:
+                cluster_type = "scaffold"
+            elif is_internal:
+                cluster_type = "internal"
+            else:
+                cluster_type = "cross-marketplace"
+
+            # Build location list with file indices
+            locations = []
+            for idx, f in zip(similar_indices, cluster_files):
+                locations.append({
+                    "file_index": idx,
+                    "marketplace": f.marketplace,
+                    "plugin": f.plugin,
+                    "path": f.relative_path,
+                    "is_official": f.is_official,
+                })
+                file_to_cluster[idx] = cluster_id
+
+            clusters.append({
+                "cluster_id": cluster_id,
+                "type": cluster_type,
+                "size": len(cluster_files),
+                "avg_similarity": round(avg_sim, 3),
+                "has_official": any(f.is_official for f in cluster_files),
+                "marketplaces": sorted(marketplaces),
+                "locations": locations,
+                "similarity_pairs": similarity_pairs,
+            })
+
+    clusters.sort(key=lambda c: c["size"], reverse=True)
+    return clusters, file_to_cluster
+
+
 def load_installed_plugins() -> list[InstalledPlugin]:
     """Load list of currently installed plugins."""
     if not INSTALLED_PLUGINS_JSON.exists():
@@ -219,14 +805,99 @@ def load_installed_plugins() -> list[InstalledPlugin]:
     return plugins
 
 
-def scan_directory_for_content(directory: Path, label: str = "") -> list[FileInfo]:
-    """Scan a directory for content files with MinHash signatures."""
-    files = []
+def iter_markdown_files(directory: Path) -> Iterator[Path]:
+    """Yield markdown files under a directory, skipping backups.
+
+    Walks the tree once with os.walk instead of a pathlib rglob per
+    caller. Any path containing "backup" is skipped; directories with
+    "backup" in their name are pruned rather than descended.
+
+    Args:
+        directory: Root directory to walk
+
+    Yields:
+        Path of each *.md file
+    """
+    if "backup" in str(directory).lower():
+        return
+
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [d for d in dirnames if "backup" not in d.lower()]
+        for name in filenames:
+            if name.endswith(".md") and "backup" not in name.lower():
+                yield Path(dirpath, name)
+
+
+def _plugin_from_relative_parts(parts: tuple[str, ...]) -> str:
+    """Derive the plugin name from a path relative to its marketplace.
+
+    Marketplaces either nest plugins under plugins/<name>/ or keep them
+    as top-level directories; files at the marketplace root belong to
+    "root".
+    """
+    if "plugins" in parts:
+        idx = parts.index("plugins")
+        if idx + 1 < len(parts):
+            return parts[idx + 1]
+    elif len(parts) > 1:
+        return parts[0]
+    return "root"
+
+
+def _read_content(path: Path) -> Optional[str]:
+    """Read a content file, returning None if it cannot be read."""
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except Exception:
+        return None
+
+
+def find_content_files(marketplaces_dir: Path) -> list[FileInfo]:
+    """Collect content files from every marketplace for the similarity scan.
+
+    Files are read on a thread pool and returned in walk order.
+
+    Args:
+        marketplaces_dir: Directory containing one subdirectory per marketplace
 
-    for md_file in directory.rglob("*.md"):
-        if "backup" in str(md_file).lower():
+    Returns:
+        List of FileInfo (content loaded, no MinHash yet) for files >100 chars
+    """
+    candidates = []
+    for mp in sorted(marketplaces_dir.iterdir()):
+        if not mp.is_dir() or mp.name.startswith("."):
             continue
 
+        # Every file in a marketplace shares its marketplace and plugin
+        # names; intern them so each name is stored once
+        mp_name = sys.intern(mp.name)
+
+        for md_file in iter_markdown_files(mp):
+            candidates.append((mp_name, md_file, md_file.relative_to(mp)))
+
+    files = []
+    with ThreadPoolExecutor() as executor:
+        contents = executor.map(_read_content, [c[1] for c in candidates])
+        for (mp_name, md_file, rel_to_mp), content in zip(candidates, contents):
+            if content is None or len(content) < 100:
+                continue
+
+            files.append(FileInfo(
+                marketplace=mp_name,
+                plugin=sys.intern(_plugin_from_relative_parts(rel_to_mp.parts)),
+                relative_path=str(rel_to_mp),
+                full_path=str(md_file),
+                content=content,
+            ))
+
+    return files
+
+
+def scan_directory_for_content(directory: Path, label: str = "") -> list[FileInfo]:
+    """Scan a directory for content files with MinHash signatures."""
+    candidates = []
+
+    for md_file in iter_markdown_files(directory):
         try:
             content = md_file.read_text(encoding="utf-8", errors="replace")
             if len(content) < 100:
@@ -234,22 +905,25 @@ def scan_directory_for_content(directory: Path, label: str = "") -> list[FileInf
 
             rel_path = md_file.relative_to(directory)
 
-            file_info = FileInfo(
+            candidates.append(FileInfo(
                 marketplace=label,
                 plugin=directory.name,
                 relative_path=str(rel_path),
                 full_path=str(md_file),
                 content=content,
-            )
-
-            shingles = tokenize(content)
-            if shingles:
-                file_info.minhash = compute_minhash(shingles)
-                files.append(file_info)
+            ))
 
         except Exception as err:
             print(f"Warning: Could not read {md_file}: {err}", file=sys.stderr)
 
+    # Hash in one batch so large directories use the worker pool and
+    # identical files are hashed once (see _compute_signatures())
+    files = []
+    for file_info, minhash in zip(candidates, _compute_signatures(candidates, None)):
+        if minhash is not None:
+            file_info.minhash = minhash
+            files.append(file_info)
+
     return files
 
 
@@ -435,6 +1109,7 @@ def scan_directory_for_content_with_progress(
     label: str = "",
     progress: Optional[Progress] = None,
     task_id: Optional[int] = None,
+    md_files: Optional[list[Path]] = None,
 ) -> list[FileInfo]:
     """Scan a directory for content files with MinHash signatures and optional progress tracking.
 
@@ -443,17 +1118,16 @@ def scan_directory_for_content_with_progress(
         label: Label for marketplace/plugin name
         progress: Optional Progress instance for tracking
         task_id: Optional task ID if using existing progress bar
+        md_files: Markdown files already listed by the caller (e.g. to size
+            the progress bar); the directory is walked if omitted
 
     Returns:
         List of FileInfo objects with computed MinHash signatures
     """
     files = []
 
-    # First pass: collect all markdown files
-    md_files = [
-        md_file for md_file in directory.rglob("*.md")
-        if "backup" not in str(md_file).lower()
-    ]
+    if md_files is None:
+        md_files = list(iter_markdown_files(directory))
 
     if not md_files:
         return files
@@ -475,9 +1149,8 @@ def scan_directory_for_content_with_progress(
                 content=content,
             )
 
-            shingles = tokenize(content)
-            if shingles:
-                file_info.minhash = compute_minhash(shingles)
+            file_info.minhash = compute_content_minhash(content)
+            if file_info.minhash is not None:
                 files.append(file_info)
 
         except Exception as err:
@@ -519,18 +1192,17 @@ def load_baseline_files_with_progress(
         files = []
 
         if progress:
-            # Count total files first for accurate progress
-            total_files = 0
-            for plugin in plugins:
-                plugin_files = list(plugin.install_path.rglob("*.md"))
-                total_files += len([f for f in plugin_files if "backup" not in str(f).lower()])
+            # List files once up front so the progress total is accurate
+            # without walking each plugin a second time
+            listings = [list(iter_markdown_files(plugin.install_path)) for plugin in plugins]
+            total_files = sum(len(md_files) for md_files in listings)
 
             task = progress.add_task(f"Loading baseline: {spec}", total=total_files)
 
-            for plugin in plugins:
+            for plugin, md_files in zip(plugins, listings):
                 label = f"{plugin.name}@{plugin.marketplace}"
                 plugin_files = scan_directory_for_content_with_progress(
-                    plugin.install_path, label, progress, task
+                    plugin.install_path, label, progress, task, md_files
                 )
                 files.extend(plugin_files)
         else:
@@ -557,10 +1229,10 @@ def load_baseline_files_with_progress(
         target_path = marketplace_path
 
     if progress:
-        # Count files
-        md_files = list(target_path.rglob("*.md"))
-        total_files = len([f for f in md_files if "backup" not in str(f).lower()])
-        task = progress.add_task(f"Loading baseline: {spec}", total=total_files)
-        return scan_directory_for_content_with_progress(target_path, marketplace_name, progress, task)
+        md_files = list(iter_markdown_files(target_path))
+        task = progress.add_task(f"Loading baseline: {spec}", total=len(md_files))
+        return scan_directory_for_content_with_progress(
+            target_path, marketplace_name, progress, task, md_files
+        )
     else:
         return scan_directory_for_content(target_path, marketplace_name)
@@ -3,9 +3,41 @@
 import difflib
 import re
 from dataclasses import dataclass
+from typing import Iterator
 
 from .core import FileInfo
 
+# Function/class definitions tracked as semantic changes. Matched over
+# newline-joined lines, so whitespace classes exclude the newline.
+_DEFINITION_RE = re.compile(
+    r'^[^\S\n]*(?:def|class|function|const|let|var)[^\S\n]+(\w+)', re.MULTILINE
+)
+
+# ANSI color codes
+RED = "\033[91m"
+GREEN = "\033[92m"
+CYAN = "\033[96m"
+BOLD = "\033[1m"
+RESET = "\033[0m"
+
+# Precomputed fragments for format_diff_for_terminal()
+_HEADER = "\n".join((
+    f"{BOLD}{CYAN}{'=' * 80}{RESET}",
+    f"{BOLD}File Comparison{RESET}",
+    f"{CYAN}{'=' * 80}{RESET}",
+))
+_STATS_FMT = "\n".join((
+    f"{BOLD}Statistics:{RESET}",
+    "  Lines in file 1: {}",
+    "  Lines in file 2: {}",
+    "  Diff lines: {}",
+))
+_CHANGE_LABELS = {
+    "function_added": f"  {GREEN}+ Function added:{RESET}",
+    "function_removed": f"  {RED}- Function removed:{RESET}",
+}
+_LINE_COLORS = {"+": GREEN, "-": RED, "@": CYAN}
+
 
 def normalize_for_diff(text: str) -> list[str]:
     """Normalize text for semantic comparison by removing formatting noise.
@@ -93,6 +125,24 @@ def compute_file_diff(
     lines1 = normalize_for_diff(file1.content)
     lines2 = normalize_for_diff(file2.content)
 
+    # Fast path: files that differ only in formatting have no diff and no
+    # semantic changes, so skip difflib and the definition scans entirely
+    if lines1 == lines2:
+        return FileDiff(
+            file1_location=file1.location,
+            file2_location=file2.location,
+            similarity=similarity,
+            unified_diff=[],
+            semantic_changes=[],
+            stats={
+                "total_lines_file1": len(lines1),
+                "total_lines_file2": len(lines2),
+                "diff_lines": 0,
+                "functions_added": 0,
+                "functions_removed": 0,
+            },
+        )
+
     # Generate unified diff
     unified_diff = list(difflib.unified_diff(
         lines1,
@@ -107,20 +157,9 @@ def compute_file_diff(
     semantic_changes = []
 
     # Track function/class definitions
-    func_pattern = re.compile(r'^\s*(?:def|class|function|const|let|var)\s+(\w+)')
-
-    funcs1 = set()
-    funcs2 = set()
-
-    for line in lines1:
-        match = func_pattern.search(line)
-        if match:
-            funcs1.add(match.group(1))
-
-    for line in lines2:
-        match = func_pattern.search(line)
-        if match:
-            funcs2.add(match.group(1))
+    # One findall over each file instead of a match() call per line
+    funcs1 = set(_DEFINITION_RE.findall("\n".join(lines1)))
+    funcs2 = set(_DEFINITION_RE.findall("\n".join(lines2)))
 
     # Functions added
     for func in sorted(funcs2 - funcs1):
@@ -136,11 +175,17 @@ def compute_file_diff(
             "name": func,
         })
 
+    # Count changed lines. The first two lines of a non-empty unified diff
+    # are the ---/+++ file headers; content lines that themselves begin
+    # with "--" or "++" (markdown rules, YAML fences) must still count.
+    header_lines = 2 if unified_diff else 0
+    diff_lines = sum(1 for line in unified_diff if line[:1] in ("+", "-")) - header_lines
+
     # Compute stats
     stats = {
         "total_lines_file1": len(lines1),
         "total_lines_file2": len(lines2),
-        "diff_lines": len([line for line in unified_diff if line.startswith(('+', '-')) and not line.startswith(('+++', '---'))]),
+        "diff_lines": diff_lines,
         "functions_added": len(funcs2 - funcs1),
         "functions_removed": len(funcs1 - funcs2),
     }
@@ -155,6 +200,42 @@ def compute_file_diff(
     )
 
 
+def _iter_terminal_lines(diff: FileDiff) -> Iterator[str]:
+    """Yield the lines of the terminal rendering of a diff."""
+    stats = diff.stats
+
+    yield from (
+        _HEADER,
+        f"{BOLD}File 1:{RESET} {diff.file1_location}",
+        f"{BOLD}File 2:{RESET} {diff.file2_location}",
+        f"{BOLD}Similarity:{RESET} {diff.similarity * 100:.1f}%",
+        "",
+        _STATS_FMT.format(
+            stats["total_lines_file1"],
+            stats["total_lines_file2"],
+            stats["diff_lines"],
+        ),
+        "",
+    )
+
+    if diff.semantic_changes:
+        yield f"{BOLD}Semantic Changes:{RESET}"
+        for change in diff.semantic_changes:
+            label = _CHANGE_LABELS.get(change["type"])
+            if label:
+                yield f"{label} {change['name']}"
+        yield ""
+
+    if diff.unified_diff:
+        yield f"{BOLD}Unified Diff:{RESET}"
+        # The first two lines are the ---/+++ file headers
+        for line in diff.unified_diff[:2]:
+            yield f"{BOLD}{line}{RESET}"
+        for line in diff.unified_diff[2:]:
+            color = _LINE_COLORS.get(line[:1])
+            yield f"{color}{line}{RESET}" if color else line
+
+
 def format_diff_for_terminal(diff: FileDiff) -> str:
     """Format diff with color codes for terminal display.
 
@@ -164,54 +245,4 @@ def format_diff_for_terminal(diff: FileDiff) -> str:
     Returns:
         Colored string for terminal output
     """
-    # ANSI color codes
-    RED = "\033[91m"
-    GREEN = "\033[92m"
-    CYAN = "\033[96m"
-    BOLD = "\033[1m"
-    RESET = "\033[0m"
-
-    lines = []
-
-    # Header
-    lines.append(f"{BOLD}{CYAN}{'=' * 80}{RESET}")
-    lines.append(f"{BOLD}File Comparison{RESET}")
-    lines.append(f"{CYAN}{'=' * 80}{RESET}")
-    lines.append(f"{BOLD}File 1:{RESET} {diff.file1_location}")
-    lines.append(f"{BOLD}File 2:{RESET} {diff.file2_location}")
-    lines.append(f"{BOLD}Similarity:{RESET} {diff.similarity * 100:.1f}%")
-    lines.append("")
-
-    # Stats
-    lines.append(f"{BOLD}Statistics:{RESET}")
-    lines.append(f"  Lines in file 1: {diff.stats['total_lines_file1']}")
-    lines.append(f"  Lines in file 2: {diff.stats['total_lines_file2']}")
-    lines.append(f"  Diff lines: {diff.stats['diff_lines']}")
-    lines.append("")
-
-    # Semantic changes
-    if diff.semantic_changes:
-        lines.append(f"{BOLD}Semantic Changes:{RESET}")
-        for change in diff.semantic_changes:
-            if change["type"] == "function_added":
-                lines.append(f"  {GREEN}+ Function added:{RESET} {change['name']}")
-            elif change["type"] == "function_removed":
-                lines.append(f"  {RED}- Function removed:{RESET} {change['name']}")
-        lines.append("")
-
-    # Unified diff
-    if diff.unified_diff:
-        lines.append(f"{BOLD}Unified Diff:{RESET}")
-        for line in diff.unified_diff:
-            if line.startswith('+++') or line.startswith('---'):
-                lines.append(f"{BOLD}{line}{RESET}")
-            elif line.startswith('+'):
-                lines.append(f"{GREEN}{line}{RESET}")
-            elif line.startswith('-'):
-                lines.append(f"{RED}{line}{RESET}")
-            elif line.startswith('@@'):
-                lines.append(f"{CYAN}{line}{RESET}")
-            else:
-                lines.append(line)
-
-    return "\n".join(lines)
+    return "\n".join(_iter_terminal_lines(diff))
@@ -7,95 +7,69 @@ import sys
 import tempfile
 from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "plugin"))
+import pytest
 
 from librarian.checkout import find_skill_path, checkout_skill
 
 
-def test_checkout_single_file():
-    """Test checking out a single skill file."""
-    # Find a known skill
+@pytest.fixture(scope="module")
+def checked_out_skill(request, tmp_path_factory):
+    """Check out theme-factory once per layout and share it across tests.
+
+    Parametrized indirectly with ``preserve_structure``; yields the
+    CheckoutResult and its destination directory.
+    """
     skill_path = find_skill_path("anthropic-agent-skills/theme-factory")
 
     if not skill_path or not skill_path.exists():
-        print("Skipping test - theme-factory skill not found")
-        return
-
-    print(f"Found skill at: {skill_path}")
+        pytest.skip("theme-factory skill not found")
 
-    # Checkout to temp directory
-    with tempfile.TemporaryDirectory() as tmpdir:
-        dest = Path(tmpdir) / "test-checkout"
+    preserve_structure = request.param
+    dest = tmp_path_factory.mktemp("structured" if preserve_structure else "flat")
+    return checkout_skill(skill_path, dest, preserve_structure=preserve_structure), dest
 
-        result = checkout_skill(skill_path, dest, preserve_structure=True)
 
-        assert result.success, f"Checkout failed: {result.message}"
-        assert len(result.files_copied) > 0, "No files were copied"
-        assert result.target_path == dest
-        assert (dest / ".librarian-checkout.json").exists(), "Metadata file not created"
+@pytest.mark.parametrize("checked_out_skill", [True], indirect=True)
+def test_checkout_single_file(checked_out_skill):
+    """Test checking out a single skill file."""
+    result, dest = checked_out_skill
 
-        # Verify metadata
-        with open(dest / ".librarian-checkout.json") as fh:
-            metadata = json.load(fh)
+    assert result.success, f"Checkout failed: {result.message}"
+    assert len(result.files_copied) > 0, "No files were copied"
+    assert result.target_path == dest
+    assert (dest / ".librarian-checkout.json").exists(), "Metadata file not created"
 
-        assert "_checkout" in metadata
-        assert "source" in metadata["_checkout"]
-        assert "timestamp" in metadata["_checkout"]
-        assert "files_copied" in metadata["_checkout"]
-        assert metadata["_checkout"]["files_copied"] == len(result.files_copied)
+    # Verify metadata
+    metadata = json.loads((dest / ".librarian-checkout.json").read_bytes())
 
-        print(f"  Checked out {len(result.files_copied)} files")
-        print("  Metadata verified")
-        print("Test passed: checkout_single_file")
+    assert "_checkout" in metadata
+    assert "source" in metadata["_checkout"]
+    assert "timestamp" in metadata["_checkout"]
+    assert "files_copied" in metadata["_checkout"]
+    assert metadata["_checkout"]["files_copied"] == len(result.files_copied)
 
 
-def test_checkout_preserves_frontmatter():
+@pytest.mark.parametrize("checked_out_skill", [True], indirect=True)
+def test_checkout_preserves_frontmatter(checked_out_skill):
     """Test that frontmatter is extracted during checkout."""
-    skill_path = find_skill_path("anthropic-agent-skills/theme-factory")
-
-    if not skill_path or not skill_path.exists():
-        print("Skipping test - theme-factory skill not found")
-        return
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        dest = Path(tmpdir) / "test-frontmatter"
-
-        result = checkout_skill(skill_path, dest)
+    result, _ = checked_out_skill
 
-        assert result.success
-        assert result.metadata is not None
+    assert result.success
+    assert result.metadata is not None
+    assert "_checkout" in result.metadata
 
-        # Check if any frontmatter was extracted
-        non_checkout_keys = [k for k in result.metadata.keys() if k != "_checkout"]
-        if non_checkout_keys:
-            print(f"  Extracted frontmatter keys: {non_checkout_keys}")
 
-        print("Test passed: checkout_preserves_frontmatter")
-
-
-def test_checkout_flat_mode():
+@pytest.mark.parametrize("checked_out_skill", [False], indirect=True)
+def test_checkout_flat_mode(checked_out_skill):
     """Test checkout with flat file structure."""
-    skill_path = find_skill_path("anthropic-agent-skills/theme-factory")
+    result, _ = checked_out_skill
 
-    if not skill_path or not skill_path.exists():
-        print("Skipping test - theme-factory skill not found")
-        return
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        dest = Path(tmpdir) / "test-flat"
+    assert result.success
+    assert len(result.files_copied) > 0
 
-        result = checkout_skill(skill_path, dest, preserve_structure=False)
-
-        assert result.success
-        assert len(result.files_copied) > 0
-
-        # In flat mode, all files should be in the root directory (no subdirs)
-        for file_path in result.files_copied:
-            assert os.sep not in file_path and "/" not in file_path, f"File not in flat structure: {file_path}"
-
-        print(f"  Copied {len(result.files_copied)} files to flat structure")
-        print("Test passed: checkout_flat_mode")
+    # In flat mode, all files should be in the root directory (no subdirs)
+    for file_path in result.files_copied:
+        assert os.sep not in file_path and "/" not in file_path, f"File not in flat structure: {file_path}"
 
 
 def test_find_skill_by_name():
@@ -103,12 +77,9 @@ def test_find_skill_by_name():
     # Try to find theme-factory by name only
     skill_path = find_skill_path("theme-factory")
 
-    if skill_path and skill_path.exists():
-        print(f"  Found skill: {skill_path}")
-        assert "theme-factory" in str(skill_path).lower()
-        print("Test passed: find_skill_by_name")
-    else:
-        print("Skipping test - theme-factory not found")
+    if not (skill_path and skill_path.exists()):
+        pytest.skip("theme-factory not found")
+    assert "theme-factory" in str(skill_path).lower()
 
 
 def test_find_skill_full_path():
@@ -117,8 +88,6 @@ def test_find_skill_full_path():
 
     # This might not exist depending on directory structure
     # Just verify the function doesn't crash
-    print(f"  Full path search result: {skill_path}")
-    print("Test passed: find_skill_full_path")
 
 
 def test_checkout_nonexistent_skill():
@@ -131,18 +100,7 @@ def test_checkout_nonexistent_skill():
 
         assert not result.success, "Checkout should have failed"
         assert "does not exist" in result.message.lower()
-        print("  Correctly handled nonexistent path")
-        print("Test passed: checkout_nonexistent_skill")
 
 
 if __name__ == "__main__":
-    print("Running checkout tests...\n")
-
-    test_checkout_single_file()
-    test_checkout_preserves_frontmatter()
-    test_checkout_flat_mode()
-    test_find_skill_by_name()
-    test_find_skill_full_path()
-    test_checkout_nonexistent_skill()
-
-    print("\nAll checkout tests passed!")
+    sys.exit(pytest.main([__file__, "-v"]))
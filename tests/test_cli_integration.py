@@ -2,10 +2,8 @@
 """Integration tests for CLI sanity checks."""
 
 import sys
-from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "plugin"))
+import pytest
 
 from librarian.core import check_similarity_sanity
 
@@ -26,7 +24,6 @@ def test_scan_output_includes_confidence_and_warnings():
     assert result.confidence == "low"
     assert len(result.warnings) > 0
     assert "0% cluster membership" in result.warnings[0]
-    print("✓ Scan sanity check: large ecosystem warning works")
 
 
 def test_compare_sanity_checks():
@@ -41,7 +38,6 @@ def test_compare_sanity_checks():
 
     assert result.confidence in ["medium", "low"]
     assert any("low similarity ratio" in w.lower() for w in result.warnings)
-    print("✓ Compare sanity check: low similarity ratio warning works")
 
     # Test case 2: High similarity ratio
     result = check_similarity_sanity(
@@ -53,7 +49,6 @@ def test_compare_sanity_checks():
 
     assert result.confidence in ["medium", "low"]
     assert any("high similarity ratio" in w.lower() for w in result.warnings)
-    print("✓ Compare sanity check: high similarity ratio warning works")
 
 
 def test_json_output_structure():
@@ -77,8 +72,6 @@ def test_json_output_structure():
     assert result_dict["confidence"] == "high"
     assert result_dict["warnings"] == []
 
-    print("✓ JSON output structure is correct")
-
 
 def test_confidence_levels():
     """Test that different scenarios produce appropriate confidence levels."""
@@ -118,8 +111,6 @@ def test_confidence_levels():
     )
     assert result.confidence == "none"
 
-    print("✓ Confidence levels are correctly assigned")
-
 
 def test_warning_thresholds():
     """Test that warnings are triggered at correct thresholds."""
@@ -163,16 +154,6 @@ def test_warning_thresholds():
     ratio_warnings = [w for w in result.warnings if "ratio" in w.lower()]
     assert len(ratio_warnings) > 0
 
-    print("✓ Warning thresholds work correctly")
-
 
 if __name__ == "__main__":
-    print("Running CLI integration tests...\n")
-
-    test_scan_output_includes_confidence_and_warnings()
-    test_compare_sanity_checks()
-    test_json_output_structure()
-    test_confidence_levels()
-    test_warning_thresholds()
-
-    print("\n✓ All integration tests passed!")
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -1,15 +1,27 @@
 #!/usr/bin/env python3
 """Tests for marketplace-to-marketplace comparison functionality."""
 
+import functools
+import json
 import sys
 from pathlib import Path
-from unittest.mock import Mock, patch
+from types import SimpleNamespace
 
-# Add parent directory to path to import librarian module
-sys.path.insert(0, str(Path(__file__).parent.parent / "plugin"))
+import pytest
 
+from librarian import cli
 from librarian.cli import cmd_compare_marketplaces
-from librarian.core import FileInfo, compute_minhash, tokenize
+from librarian.core import FileInfo, compute_content_minhash
+
+
+@functools.lru_cache(maxsize=None)
+def _minhash_for(content: str):
+    """Signature for content, shared by every test file with that content.
+
+    Comparisons only read signatures, so one MinHash per distinct string
+    is safe to reuse across FileInfo objects and tests.
+    """
+    return compute_content_minhash(content)
 
 
 def create_test_file(content: str, marketplace: str, plugin: str, rel_path: str) -> FileInfo:
@@ -21,302 +33,152 @@ def create_test_file(content: str, marketplace: str, plugin: str, rel_path: str)
         full_path=f"/tmp/{rel_path}",
         content=content,
     )
-    shingles = tokenize(content)
-    if shingles:
-        f.minhash = compute_minhash(shingles)
+    f.minhash = _minhash_for(content)
     return f
 
 
-def test_identical_marketplaces():
-    """Test comparison of identical marketplaces (100% overlap)."""
-    print("Testing identical marketplaces (100% overlap)...")
-
-    # Create mock args
-    args = Mock()
-    args.marketplace_a = "test-mp-a"
-    args.marketplace_b = "test-mp-b"
-    args.json = False
-
-    # Create identical content
-    content1 = "This is a test skill for data processing and analysis."
-    content2 = "This is a test skill for data processing and analysis."
-
+def run_compare(monkeypatch, capsys, files_a, files_b, as_json=False) -> str:
+    """Run compare-marketplaces on pre-scanned files and return its output."""
+    paths = {"test-mp-a": Path("/tmp/mp-a"), "test-mp-b": Path("/tmp/mp-b")}
+    scans = iter([files_a, files_b])
+    monkeypatch.setattr(cli, "find_marketplace_path", paths.get)
+    monkeypatch.setattr(cli, "scan_directory_for_content", lambda path, label: next(scans))
+
+    args = SimpleNamespace(marketplace_a="test-mp-a", marketplace_b="test-mp-b", json=as_json)
+    cmd_compare_marketplaces(args)
+    return capsys.readouterr().out
+
+
+# Contents shared by both marketplaces and unique to each in the large case
+LARGE_SHARED = [f"Shared content number {i} with data processing and analysis features." for i in range(10)]
+LARGE_UNIQUE_A = [f"Unique to A number {i} with specific marketplace A features and tools." for i in range(5)]
+LARGE_UNIQUE_B = [f"Unique to B number {i} with specific marketplace B features and tools." for i in range(5)]
+
+SHARED_CONTENT = "This is shared content about data processing that appears in both marketplaces."
+
+
+@pytest.mark.parametrize("contents_a, contents_b, as_json, expected", [
+    pytest.param(
+        ["This is a test skill for data processing and analysis."],
+        ["This is a test skill for data processing and analysis."],
+        False,
+        [("Identical marketplaces", "100%")],
+        id="identical",
+    ),
+    pytest.param(
+        ["This is unique content about machine learning and neural networks for AI applications."],
+        ["Completely different topic about cooking recipes and culinary arts for chefs."],
+        False,
+        [("Disjoint", "0%", "0 files")],
+        id="disjoint",
+    ),
+    pytest.param(
+        [SHARED_CONTENT, "Unique content A about specific feature only in marketplace A with detailed examples."],
+        [SHARED_CONTENT, "Unique content B about different feature only in marketplace B with tutorials."],
+        False,
+        [("Shared", "overlap"), ("unique",)],
+        id="partial-overlap",
+    ),
+    pytest.param(
+        ["Some content in marketplace A."],
+        [],
+        False,
+        [("WARNING", "0 files")],
+        id="empty-marketplace",
+    ),
+    pytest.param(
+        ["Test content for JSON output validation."],
+        ["Test content for JSON output validation."],
+        True,
+        [("marketplace_a", "{")],
+        id="json-output",
+    ),
+    # Below-threshold pair: only checks that the comparison completes
+    pytest.param(
+        ["This is content about data processing with many specific details and examples."],
+        ["This content discusses cooking recipes with many specific instructions and photos."],
+        False,
+        [],
+        id="similarity-threshold",
+    ),
+    pytest.param(
+        LARGE_SHARED + LARGE_UNIQUE_A,
+        LARGE_SHARED + LARGE_UNIQUE_B,
+        False,
+        [("Shared", "overlap"), ("unique", "only")],
+        id="large-marketplaces",
+    ),
+])
+def test_compare_marketplaces_output(monkeypatch, capsys, contents_a, contents_b, as_json, expected):
+    """Each expected group has at least one of its phrases in the output."""
     files_a = [
-        create_test_file(content1, "test-mp-a", "plugin1", "skills/test.md"),
+        create_test_file(c, "test-mp-a", "plugin1", f"skills/a-{i}.md") for i, c in enumerate(contents_a)
     ]
-
-    files_b = [
-        create_test_file(content2, "test-mp-b", "plugin1", "skills/test.md"),
-    ]
-
-    # Mock the necessary functions
-    with patch('librarian.cli.find_marketplace_path') as mock_find_mp, \
-         patch('librarian.cli.scan_directory_for_content') as mock_scan, \
-         patch('builtins.print') as mock_print:
-
-        mock_find_mp.side_effect = [Path("/tmp/mp-a"), Path("/tmp/mp-b")]
-        mock_scan.side_effect = [files_a, files_b]
-
-        cmd_compare_marketplaces(args)
-
-        # Check that output mentions 100% overlap
-        printed_output = " ".join([str(call.args[0]) if call.args else "" for call in mock_print.call_args_list])
-        assert "Identical marketplaces" in printed_output or "100%" in printed_output
-        print("[PASS] Identical marketplaces detected correctly")
-
-
-def test_disjoint_marketplaces():
-    """Test comparison of completely different marketplaces (0% overlap)."""
-    print("Testing disjoint marketplaces (0% overlap)...")
-
-    args = Mock()
-    args.marketplace_a = "test-mp-a"
-    args.marketplace_b = "test-mp-b"
-    args.json = False
-
-    # Create completely different content
-    content_a = "This is unique content about machine learning and neural networks for AI applications."
-    content_b = "Completely different topic about cooking recipes and culinary arts for chefs."
-
-    files_a = [
-        create_test_file(content_a, "test-mp-a", "plugin1", "skills/ml.md"),
-    ]
-
-    files_b = [
-        create_test_file(content_b, "test-mp-b", "plugin1", "skills/cooking.md"),
-    ]
-
-    with patch('librarian.cli.find_marketplace_path') as mock_find_mp, \
-         patch('librarian.cli.scan_directory_for_content') as mock_scan, \
-         patch('builtins.print') as mock_print:
-
-        mock_find_mp.side_effect = [Path("/tmp/mp-a"), Path("/tmp/mp-b")]
-        mock_scan.side_effect = [files_a, files_b]
-
-        cmd_compare_marketplaces(args)
-
-        printed_output = " ".join([str(call.args[0]) if call.args else "" for call in mock_print.call_args_list])
-        assert "Disjoint" in printed_output or "0%" in printed_output or "0 files" in printed_output
-        print("[PASS] Disjoint marketplaces detected correctly")
-
-
-def test_partial_overlap():
-    """Test comparison with partial overlap."""
-    print("Testing partial overlap...")
-
-    args = Mock()
-    args.marketplace_a = "test-mp-a"
-    args.marketplace_b = "test-mp-b"
-    args.json = False
-
-    # Create overlapping and unique content
-    shared_content = "This is shared content about data processing that appears in both marketplaces."
-    unique_a = "Unique content A about specific feature only in marketplace A with detailed examples."
-    unique_b = "Unique content B about different feature only in marketplace B with tutorials."
-
-    files_a = [
-        create_test_file(shared_content, "test-mp-a", "plugin1", "skills/shared.md"),
-        create_test_file(unique_a, "test-mp-a", "plugin1", "skills/unique-a.md"),
-    ]
-
     files_b = [
-        create_test_file(shared_content, "test-mp-b", "plugin1", "skills/shared.md"),
-        create_test_file(unique_b, "test-mp-b", "plugin1", "skills/unique-b.md"),
+        create_test_file(c, "test-mp-b", "plugin1", f"skills/b-{i}.md") for i, c in enumerate(contents_b)
     ]
 
-    with patch('librarian.cli.find_marketplace_path') as mock_find_mp, \
-         patch('librarian.cli.scan_directory_for_content') as mock_scan, \
-         patch('builtins.print') as mock_print:
+    output = run_compare(monkeypatch, capsys, files_a, files_b, as_json=as_json)
 
-        mock_find_mp.side_effect = [Path("/tmp/mp-a"), Path("/tmp/mp-b")]
-        mock_scan.side_effect = [files_a, files_b]
+    for phrases in expected:
+        assert any(phrase in output for phrase in phrases), phrases
 
-        cmd_compare_marketplaces(args)
 
-        printed_output = " ".join([str(call.args[0]) if call.args else "" for call in mock_print.call_args_list])
+# Near-duplicates of one 200-word document, each with a few words replaced.
+# None is an exact copy of another, so matching goes through LSH scoring.
+NEAR_BASE = [f"term{i}" for i in range(200)]
 
-        # Should show both shared and unique content
-        assert "Shared" in printed_output or "overlap" in printed_output
-        assert "unique" in printed_output.lower()
-        print("[PASS] Partial overlap detected correctly")
 
+def _variant(replaced, tag: str) -> str:
+    """NEAR_BASE with the words at the given positions replaced."""
+    words = list(NEAR_BASE)
+    for k in replaced:
+        words[k] = f"{tag}{k}"
+    return " ".join(words)
 
-def test_empty_marketplace():
-    """Test comparison when one marketplace is empty."""
-    print("Testing empty marketplace...")
 
-    args = Mock()
-    args.marketplace_a = "test-mp-a"
-    args.marketplace_b = "test-mp-b"
-    args.json = False
+NEAR_B = _variant(range(10, 200, 60), "bee")      # 4 words replaced
+NEAR_CLOSE = _variant(range(30, 200, 40), "close")  # Jaccard ~0.83 with NEAR_B
+NEAR_FAR = _variant(range(5, 200, 30), "far")       # Jaccard ~0.71 with NEAR_B
 
-    content_a = "Some content in marketplace A."
 
+@pytest.mark.parametrize("contents_a, expected_a", [
+    pytest.param([NEAR_FAR, NEAR_CLOSE], 1, id="closest-candidate-wins"),
+    pytest.param([NEAR_CLOSE, NEAR_FAR], 0, id="candidate-order-irrelevant"),
+    pytest.param([NEAR_CLOSE, NEAR_CLOSE], 0, id="tie-goes-to-earliest"),
+])
+def test_compare_marketplaces_scores_near_duplicates(monkeypatch, capsys, contents_a, expected_a):
+    """Non-identical overlaps report the best candidate and its estimated Jaccard."""
     files_a = [
-        create_test_file(content_a, "test-mp-a", "plugin1", "skills/test.md"),
+        create_test_file(c, "test-mp-a", "plugin1", f"skills/a-{i}.md") for i, c in enumerate(contents_a)
     ]
-    files_b = []  # Empty marketplace
-
-    with patch('librarian.cli.find_marketplace_path') as mock_find_mp, \
-         patch('librarian.cli.scan_directory_for_content') as mock_scan, \
-         patch('builtins.print') as mock_print:
-
-        mock_find_mp.side_effect = [Path("/tmp/mp-a"), Path("/tmp/mp-b")]
-        mock_scan.side_effect = [files_a, files_b]
-
-        cmd_compare_marketplaces(args)
-
-        printed_output = " ".join([str(call.args[0]) if call.args else "" for call in mock_print.call_args_list])
-        assert "WARNING" in printed_output or "0 files" in printed_output
-        print("[PASS] Empty marketplace handled correctly")
-
-
-def test_json_output():
-    """Test JSON output format."""
-    print("Testing JSON output...")
-
-    args = Mock()
-    args.marketplace_a = "test-mp-a"
-    args.marketplace_b = "test-mp-b"
-    args.json = True
-
-    content1 = "Test content for JSON output validation."
-    content2 = "Test content for JSON output validation."
-
-    files_a = [create_test_file(content1, "test-mp-a", "plugin1", "skills/test.md")]
-    files_b = [create_test_file(content2, "test-mp-b", "plugin1", "skills/test.md")]
-
-    with patch('librarian.cli.find_marketplace_path') as mock_find_mp, \
-         patch('librarian.cli.scan_directory_for_content') as mock_scan, \
-         patch('builtins.print') as mock_print:
-
-        mock_find_mp.side_effect = [Path("/tmp/mp-a"), Path("/tmp/mp-b")]
-        mock_scan.side_effect = [files_a, files_b]
-
-        cmd_compare_marketplaces(args)
-
-        # Check that JSON-like output was printed
-        printed_output = " ".join([str(call.args[0]) if call.args else "" for call in mock_print.call_args_list])
-        assert "marketplace_a" in printed_output or "{" in printed_output
-        print("[PASS] JSON output generated correctly")
-
-
-def test_similarity_threshold():
-    """Test that similarity threshold is respected."""
-    print("Testing similarity threshold...")
-
-    args = Mock()
-    args.marketplace_a = "test-mp-a"
-    args.marketplace_b = "test-mp-b"
-    args.json = False
+    files_b = [create_test_file(NEAR_B, "test-mp-b", "plugin1", "skills/b-0.md")]
 
-    # Create content with slight differences (should be below threshold if different enough)
-    content_a = "This is content about data processing with many specific details and examples."
-    content_b = "This content discusses cooking recipes with many specific instructions and photos."
+    output = run_compare(monkeypatch, capsys, files_a, files_b, as_json=True)
+    result = json.loads(output[output.rindex("\n{") + 1:])
 
-    files_a = [create_test_file(content_a, "test-mp-a", "plugin1", "skills/a.md")]
-    files_b = [create_test_file(content_b, "test-mp-b", "plugin1", "skills/b.md")]
+    expected_similarity = round(files_a[expected_a].minhash.jaccard(files_b[0].minhash), 3)
+    assert 0.7 < expected_similarity < 1.0
+    assert result["top_overlaps"] == [{
+        "file_a": f"skills/a-{expected_a}.md",
+        "file_b": "skills/b-0.md",
+        "similarity": expected_similarity,
+    }]
 
-    with patch('librarian.cli.find_marketplace_path') as mock_find_mp, \
-         patch('librarian.cli.scan_directory_for_content') as mock_scan, \
-         patch('builtins.print'):
 
-        mock_find_mp.side_effect = [Path("/tmp/mp-a"), Path("/tmp/mp-b")]
-        mock_scan.side_effect = [files_a, files_b]
-
-        # Should not crash and should handle the comparison
-        try:
-            cmd_compare_marketplaces(args)
-            print("[PASS] Similarity threshold handled correctly")
-        except Exception as e:
-            print(f"✗ Error: {e}")
-            raise
-
-
-def test_large_marketplaces():
-    """Test performance with larger marketplaces."""
-    print("Testing with larger marketplaces...")
-
-    args = Mock()
-    args.marketplace_a = "test-mp-a"
-    args.marketplace_b = "test-mp-b"
-    args.json = False
-
-    # Create 20 files in each marketplace with varying overlap
-    files_a = []
-    files_b = []
-
-    for i in range(10):
-        # Shared content
-        shared = f"Shared content number {i} with data processing and analysis features."
-        files_a.append(create_test_file(shared, "test-mp-a", "plugin1", f"skills/shared-{i}.md"))
-        files_b.append(create_test_file(shared, "test-mp-b", "plugin1", f"skills/shared-{i}.md"))
-
-    for i in range(5):
-        # Unique to A
-        unique_a = f"Unique to A number {i} with specific marketplace A features and tools."
-        files_a.append(create_test_file(unique_a, "test-mp-a", "plugin1", f"skills/unique-a-{i}.md"))
-
-        # Unique to B
-        unique_b = f"Unique to B number {i} with specific marketplace B features and tools."
-        files_b.append(create_test_file(unique_b, "test-mp-b", "plugin1", f"skills/unique-b-{i}.md"))
-
-    with patch('librarian.cli.find_marketplace_path') as mock_find_mp, \
-         patch('librarian.cli.scan_directory_for_content') as mock_scan, \
-         patch('builtins.print') as mock_print:
-
-        mock_find_mp.side_effect = [Path("/tmp/mp-a"), Path("/tmp/mp-b")]
-        mock_scan.side_effect = [files_a, files_b]
-
-        cmd_compare_marketplaces(args)
-
-        printed_output = " ".join([str(call.args[0]) if call.args else "" for call in mock_print.call_args_list])
-
-        # Should detect shared content - just verify it completed without errors
-        # and contains expected keywords
-        assert "Shared" in printed_output or "overlap" in printed_output
-        assert "unique" in printed_output.lower() or "only" in printed_output.lower()
-        print("[PASS] Large marketplace comparison completed successfully")
-
-
-def test_marketplace_not_found():
+def test_marketplace_not_found(monkeypatch, tmp_path):
     """Test error handling when marketplace is not found."""
-    print("Testing marketplace not found error...")
+    (tmp_path / "mp1").mkdir()
+    monkeypatch.setattr(cli, "find_marketplace_path", lambda name: None)
+    monkeypatch.setattr(cli, "MARKETPLACES_DIR", tmp_path)
 
-    args = Mock()
-    args.marketplace_a = "nonexistent-mp"
-    args.marketplace_b = "test-mp-b"
-    args.json = False
+    args = SimpleNamespace(marketplace_a="nonexistent-mp", marketplace_b="test-mp-b", json=False)
 
-    with patch('librarian.cli.find_marketplace_path') as mock_find_mp, \
-         patch('librarian.cli.MARKETPLACES_DIR') as mock_dir, \
-         patch('builtins.print'):
-
-        mock_find_mp.return_value = None
-        mock_mp = Mock()
-        mock_mp.is_dir.return_value = True
-        mock_mp.name = "mp1"
-        mock_dir.iterdir.return_value = [mock_mp]
+    with pytest.raises(SystemExit) as excinfo:
+        cmd_compare_marketplaces(args)
 
-        # Should raise SystemExit
-        try:
-            cmd_compare_marketplaces(args)
-            assert False, "Should have exited with error"
-        except SystemExit as e:
-            assert e.code == 1
-            print("[PASS] Marketplace not found error handled correctly")
+    assert excinfo.value.code == 1
 
 
 if __name__ == "__main__":
-    print("Running marketplace comparison tests...\n")
-
-    test_identical_marketplaces()
-    test_disjoint_marketplaces()
-    test_partial_overlap()
-    test_empty_marketplace()
-    test_json_output()
-    test_similarity_threshold()
-    test_large_marketplaces()
-    test_marketplace_not_found()
-
-    print("\n[PASS] All marketplace comparison tests passed!")
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -2,10 +2,8 @@
 """Tests for describe command functionality."""
 
 import sys
-from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "plugin"))
+import pytest
 
 from librarian.cli import (
     analyze_skill_content,
@@ -25,7 +23,6 @@ def test_analyze_skill_content_tools():
     assert "Bash" in result["tool_uses"]
     assert "Read" in result["tool_uses"]
     assert "WebFetch" in result["tool_uses"]
-    print("Tool detection works")
 
 
 def test_analyze_skill_content_complexity_low():
@@ -34,7 +31,6 @@ def test_analyze_skill_content_complexity_low():
     result = analyze_skill_content(content)
 
     assert result["complexity_score"] == "low"
-    print("Low complexity detection works")
 
 
 def test_analyze_skill_content_complexity_high():
@@ -43,7 +39,6 @@ def test_analyze_skill_content_complexity_high():
     result = analyze_skill_content(content)
 
     assert result["complexity_score"] == "high"
-    print("High complexity detection works")
 
 
 def test_analyze_skill_content_triggers():
@@ -56,7 +51,6 @@ def test_analyze_skill_content_triggers():
     result = analyze_skill_content(content)
 
     assert len(result["triggers"]) > 0
-    print("Trigger extraction works")
 
 
 def test_skill_info_to_dict():
@@ -85,7 +79,6 @@ def test_skill_info_to_dict():
     assert result["location"]["marketplace"] == "test-mp"
     assert result["metrics"]["complexity"] == "low"
     assert "Bash" in result["tool_uses"]
-    print("SkillInfo serialization works")
 
 
 def test_analyze_dependencies():
@@ -99,18 +92,7 @@ def test_analyze_dependencies():
 
     # Should find at least one dependency
     assert len(result["dependencies"]) > 0
-    print(f"Found dependencies: {result['dependencies']}")
-    print("Dependency detection works")
 
 
 if __name__ == "__main__":
-    print("Running describe tests...\n")
-
-    test_analyze_skill_content_tools()
-    test_analyze_skill_content_complexity_low()
-    test_analyze_skill_content_complexity_high()
-    test_analyze_skill_content_triggers()
-    test_skill_info_to_dict()
-    test_analyze_dependencies()
-
-    print("\nAll describe tests passed!")
+    sys.exit(pytest.main([__file__, "-v"]))
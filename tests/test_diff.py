@@ -2,12 +2,10 @@
 """Tests for diff functionality."""
 
 import sys
-from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "plugin"))
+import pytest
 
-from librarian.core import FileInfo, tokenize, compute_minhash
+from librarian.core import FileInfo, compute_content_minhash
 from librarian.diff import (
     normalize_for_diff,
     compute_file_diff,
@@ -15,17 +13,17 @@ from librarian.diff import (
 )
 
 
-def test_normalize_for_diff():
+@pytest.mark.parametrize("variant", [
+    "def foo():\n\treturn 42\n\n",
+    "def foo():  \n    return 42\t\n\n",
+    "def foo():\r\n    return 42\r\n\r\n",
+])
+def test_normalize_for_diff(variant):
     """Test that normalization removes whitespace differences."""
-    text1 = "def foo():\n    return 42\n\n"
-    text2 = "def foo():\n\treturn 42\n\n"
-
-    lines1 = normalize_for_diff(text1)
-    lines2 = normalize_for_diff(text2)
+    text = "def foo():\n    return 42\n\n"
 
     # Both should normalize to same content
-    assert lines1 == lines2
-    print("✓ Normalization removes whitespace differences")
+    assert normalize_for_diff(variant) == normalize_for_diff(text)
 
 
 def test_normalize_preserves_structure():
@@ -40,32 +38,59 @@ def test_normalize_preserves_structure():
     assert lines[1] == ""  # Blank line preserved
     assert lines[2] == "Content here"
     assert lines[3].strip() == "Indented"
-    print("✓ Normalization preserves line structure")
-
 
-def test_compute_file_diff_basic():
-    """Test basic diff computation."""
-    file1 = FileInfo(
-        marketplace="test-mp",
-        plugin="test-plugin",
-        relative_path="file1.md",
-        full_path="/tmp/file1.md",
-        content="# Header\n\nSome content\n",
-    )
 
-    file2 = FileInfo(
-        marketplace="test-mp",
-        plugin="test-plugin",
-        relative_path="file2.md",
-        full_path="/tmp/file2.md",
-        content="# Header\n\nDifferent content\n",
+def _make_file(relative_path: str, content: str, marketplace: str = "test", plugin: str = "test") -> FileInfo:
+    """Create a FileInfo with its MinHash computed."""
+    f = FileInfo(
+        marketplace=marketplace,
+        plugin=plugin,
+        relative_path=relative_path,
+        full_path=f"/tmp/{relative_path}",
+        content=content,
     )
-
-    # Compute minhash for similarity
-    file1.minhash = compute_minhash(tokenize(file1.content))
-    file2.minhash = compute_minhash(tokenize(file2.content))
-
-    diff = compute_file_diff(file1, file2)
+    f.minhash = compute_content_minhash(content)
+    return f
+
+
+@pytest.fixture(scope="module")
+def prehashed_files():
+    """File pairs for the compute_file_diff tests, hashed once per module."""
+    return {
+        "basic": (
+            _make_file("file1.md", "# Header\n\nSome content\n", "test-mp", "test-plugin"),
+            _make_file("file2.md", "# Header\n\nDifferent content\n", "test-mp", "test-plugin"),
+        ),
+        "formatting": (
+            _make_file("file1.md", "def foo():\n    return 42\n"),
+            _make_file("file2.md", "def foo():   \n\treturn 42\n"),
+        ),
+        "semantic": (
+            _make_file("old.md", "def foo():\n    pass\n\nclass Bar:\n    pass\n"),
+            _make_file("new.md", "def foo():\n    pass\n\ndef baz():\n    pass\n"),
+        ),
+        "stats": (
+            _make_file("a.md", "Line 1\nLine 2\nLine 3\n"),
+            _make_file("b.md", "Line 1\nModified Line 2\nLine 3\nLine 4\n"),
+        ),
+        "dash_prefixed": (
+            _make_file("a.md", "Title\n--\nBody\n"),
+            _make_file("b.md", "Title\n++\nBody\n"),
+        ),
+        "modified": (
+            _make_file("a.md", "Original content\n"),
+            _make_file("b.md", "Modified content\n"),
+        ),
+        "json": (
+            _make_file("a.md", "Content A\n"),
+            _make_file("b.md", "Content B\n"),
+        ),
+    }
+
+
+def test_compute_file_diff_basic(prehashed_files):
+    """Test basic diff computation."""
+    diff = compute_file_diff(*prehashed_files["basic"])
 
     # Check structure
     assert diff.file1_location == "test-mp/test-plugin/file1.md"
@@ -75,32 +100,20 @@ def test_compute_file_diff_basic():
     assert isinstance(diff.semantic_changes, list)
     assert isinstance(diff.stats, dict)
 
-    print("✓ Basic diff computation works")
-
 
-def test_semantic_changes_detection():
-    """Test that semantic changes are detected."""
-    file1 = FileInfo(
-        marketplace="test",
-        plugin="test",
-        relative_path="old.md",
-        full_path="/tmp/old.md",
-        content="def foo():\n    pass\n\nclass Bar:\n    pass\n",
-    )
+def test_formatting_only_diff_is_empty(prehashed_files):
+    """Test that files differing only in whitespace produce no diff."""
+    diff = compute_file_diff(*prehashed_files["formatting"])
 
-    file2 = FileInfo(
-        marketplace="test",
-        plugin="test",
-        relative_path="new.md",
-        full_path="/tmp/new.md",
-        content="def foo():\n    pass\n\ndef baz():\n    pass\n",
-    )
+    assert diff.unified_diff == []
+    assert diff.semantic_changes == []
+    assert diff.stats["diff_lines"] == 0
+    assert diff.stats["total_lines_file1"] == diff.stats["total_lines_file2"]
 
-    # Compute minhash for similarity
-    file1.minhash = compute_minhash(tokenize(file1.content))
-    file2.minhash = compute_minhash(tokenize(file2.content))
 
-    diff = compute_file_diff(file1, file2)
+def test_semantic_changes_detection(prehashed_files):
+    """Test that semantic changes are detected."""
+    diff = compute_file_diff(*prehashed_files["semantic"])
 
     # Should detect function added and class removed
     change_types = {c["type"] for c in diff.semantic_changes}
@@ -110,62 +123,27 @@ def test_semantic_changes_detection():
     assert "functions_added" in diff.stats
     assert "functions_removed" in diff.stats
 
-    print("✓ Semantic changes detection works")
 
-
-def test_diff_stats():
+def test_diff_stats(prehashed_files):
     """Test that diff stats are computed correctly."""
-    file1 = FileInfo(
-        marketplace="test",
-        plugin="test",
-        relative_path="a.md",
-        full_path="/tmp/a.md",
-        content="Line 1\nLine 2\nLine 3\n",
-    )
-
-    file2 = FileInfo(
-        marketplace="test",
-        plugin="test",
-        relative_path="b.md",
-        full_path="/tmp/b.md",
-        content="Line 1\nModified Line 2\nLine 3\nLine 4\n",
-    )
-
-    # Compute minhash for similarity
-    file1.minhash = compute_minhash(tokenize(file1.content))
-    file2.minhash = compute_minhash(tokenize(file2.content))
-
-    diff = compute_file_diff(file1, file2)
+    diff = compute_file_diff(*prehashed_files["stats"])
 
     assert diff.stats["total_lines_file1"] == 3
     assert diff.stats["total_lines_file2"] == 4
     assert diff.stats["diff_lines"] >= 0
 
-    print("✓ Diff stats computation works")
 
+def test_diff_stats_counts_dash_prefixed_lines(prehashed_files):
+    """Test that content lines starting with -- or ++ count as changes."""
+    diff = compute_file_diff(*prehashed_files["dash_prefixed"])
 
-def test_format_diff_for_terminal():
-    """Test that terminal formatting produces output."""
-    file1 = FileInfo(
-        marketplace="test",
-        plugin="test",
-        relative_path="a.md",
-        full_path="/tmp/a.md",
-        content="Original content\n",
-    )
-
-    file2 = FileInfo(
-        marketplace="test",
-        plugin="test",
-        relative_path="b.md",
-        full_path="/tmp/b.md",
-        content="Modified content\n",
-    )
+    # One removed ("---") and one added ("+++") line, headers excluded
+    assert diff.stats["diff_lines"] == 2
 
-    file1.minhash = compute_minhash(tokenize(file1.content))
-    file2.minhash = compute_minhash(tokenize(file2.content))
 
-    diff = compute_file_diff(file1, file2)
+def test_format_diff_for_terminal(prehashed_files):
+    """Test that terminal formatting produces output."""
+    diff = compute_file_diff(*prehashed_files["modified"])
     output = format_diff_for_terminal(diff)
 
     # Should contain basic elements
@@ -173,33 +151,10 @@ def test_format_diff_for_terminal():
     assert "test/test/a.md" in output
     assert "Similarity" in output
 
-    print("✓ Terminal formatting works")
-
 
-def test_to_dict_json_output():
+def test_to_dict_json_output(prehashed_files):
     """Test that FileDiff can be converted to JSON-serializable dict."""
-    file1 = FileInfo(
-        marketplace="test",
-        plugin="test",
-        relative_path="a.md",
-        full_path="/tmp/a.md",
-        content="Content A\n",
-    )
-
-    file2 = FileInfo(
-        marketplace="test",
-        plugin="test",
-        relative_path="b.md",
-        full_path="/tmp/b.md",
-        content="Content B\n",
-    )
-
-    # Compute minhash for similarity
-    file1.minhash = compute_minhash(tokenize(file1.content))
-    file2.minhash = compute_minhash(tokenize(file2.content))
-
-    diff = compute_file_diff(file1, file2)
-    result = diff.to_dict()
+    result = compute_file_diff(*prehashed_files["json"]).to_dict()
 
     # Check JSON structure
     assert "file1" in result
@@ -209,18 +164,6 @@ def test_to_dict_json_output():
     assert "semantic_changes" in result
     assert "unified_diff" in result
 
-    print("✓ JSON output structure is correct")
-
 
 if __name__ == "__main__":
-    print("Running diff tests...\n")
-
-    test_normalize_for_diff()
-    test_normalize_preserves_structure()
-    test_compute_file_diff_basic()
-    test_semantic_changes_detection()
-    test_diff_stats()
-    test_format_diff_for_terminal()
-    test_to_dict_json_output()
-
-    print("\n✓ All diff tests passed!")
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -1,36 +1,54 @@
 """Tests for improved JSON structure and queryability."""
 
 import json
-from datetime import datetime, timezone
 
+import pytest
 
-def test_json_has_metadata_section(tmp_path):
-    """Verify metadata section exists with required fields."""
-    # Create a sample report structure
-    report = {
-        "metadata": {
-            "version": "2.0",
-            "generated_at": datetime.now(timezone.utc).isoformat(),
-            "similarity_threshold": 0.7,
-            "num_permutations": 128,
-            "confidence": "high",
-            "warnings": [],
-        },
-        "summary": {},
-        "file_index": [],
-        "marketplace_index": {},
-        "filename_index": {},
-        "clusters": [],
-    }
+from librarian import core
 
-    # Write to temp file
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
+# Fixed timestamp keeps metadata fixtures deterministic
+_FIXED_ISO = "2025-01-01T00:00:00+00:00"
+
+_BASE_REPORT = {
+    "metadata": {"version": "2.0"},
+    "summary": {},
+    "file_index": [],
+    "marketplace_index": {},
+    "filename_index": {},
+    "clusters": [],
+}
+
+_FULL_METADATA = {
+    "version": "2.0",
+    "generated_at": _FIXED_ISO,
+    "similarity_threshold": 0.7,
+    "num_permutations": 128,
+    "confidence": "high",
+    "warnings": [],
+}
+
+
+def _report(**sections) -> dict:
+    """Build a v2 report from the shared skeleton with the given sections.
+
+    Unspecified sections are shared with _BASE_REPORT, so tests must not
+    mutate them in place.
+    """
+    return {**_BASE_REPORT, **sections}
+
+
+@pytest.fixture
+def roundtrip():
+    """Serialize and parse a report in memory, as the CLI would write it."""
+    return lambda report: json.loads(core.dumps_json(report))
+
+
+def test_json_has_metadata_section(roundtrip):
+    """Verify metadata section exists with required fields."""
+    report = _report(metadata=_FULL_METADATA)
 
     # Read back and validate
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(report)
 
     assert "metadata" in loaded
     assert loaded["metadata"]["version"] == "2.0"
@@ -41,12 +59,10 @@ def test_json_has_metadata_section(tmp_path):
     assert "warnings" in loaded["metadata"]
 
 
-def test_json_has_file_index(tmp_path):
+def test_json_has_file_index(roundtrip):
     """Verify file_index array exists and has correct structure."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [
+    report = _report(
+        file_index=[
             {
                 "file_index": 0,
                 "marketplace": "test-mp",
@@ -68,17 +84,9 @@ def test_json_has_file_index(tmp_path):
                 "in_cluster": True,
             },
         ],
-        "marketplace_index": {},
-        "filename_index": {},
-        "clusters": [],
-    }
-
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
+    )
 
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(report)
 
     assert "file_index" in loaded
     assert isinstance(loaded["file_index"], list)
@@ -96,69 +104,24 @@ def test_json_has_file_index(tmp_path):
     assert "in_cluster" in file_entry
 
 
-def test_json_has_marketplace_index(tmp_path):
-    """Verify marketplace_index exists and enables fast lookups."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [],
-        "marketplace_index": {
-            "marketplace-a": [0, 1, 5],
-            "marketplace-b": [2, 3],
-        },
-        "filename_index": {},
-        "clusters": [],
-    }
-
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
-
-    with open(report_path) as f:
-        loaded = json.load(f)
-
-    assert "marketplace_index" in loaded
-    assert isinstance(loaded["marketplace_index"], dict)
-    assert "marketplace-a" in loaded["marketplace_index"]
-    assert loaded["marketplace_index"]["marketplace-a"] == [0, 1, 5]
-
-
-def test_json_has_filename_index(tmp_path):
-    """Verify filename_index exists and enables fast lookups."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [],
-        "marketplace_index": {},
-        "filename_index": {
-            "test.md": [0, 5, 10],
-            "skill.md": [1, 2],
-        },
-        "clusters": [],
-    }
-
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
+@pytest.mark.parametrize("section, index, key, ids", [
+    ("marketplace_index", {"marketplace-a": [0, 1, 5], "marketplace-b": [2, 3]}, "marketplace-a", [0, 1, 5]),
+    ("filename_index", {"test.md": [0, 5, 10], "skill.md": [1, 2]}, "test.md", [0, 5, 10]),
+])
+def test_json_has_lookup_index(roundtrip, section, index, key, ids):
+    """Verify marketplace_index and filename_index exist and enable fast lookups."""
+    loaded = roundtrip(_report(**{section: index}))
 
-    with open(report_path) as f:
-        loaded = json.load(f)
-
-    assert "filename_index" in loaded
-    assert isinstance(loaded["filename_index"], dict)
-    assert "test.md" in loaded["filename_index"]
-    assert loaded["filename_index"]["test.md"] == [0, 5, 10]
+    assert section in loaded
+    assert isinstance(loaded[section], dict)
+    assert key in loaded[section]
+    assert loaded[section][key] == ids
 
 
-def test_clusters_have_cluster_id(tmp_path):
+def test_clusters_have_cluster_id(roundtrip):
     """Verify clusters have cluster_id field."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [],
-        "marketplace_index": {},
-        "filename_index": {},
-        "clusters": [
+    report = _report(
+        clusters=[
             {
                 "cluster_id": 0,
                 "type": "internal",
@@ -180,29 +143,19 @@ def test_clusters_have_cluster_id(tmp_path):
                 "similarity_pairs": [],
             },
         ],
-    }
+    )
 
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
-
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(report)
 
     assert len(loaded["clusters"]) == 2
     assert loaded["clusters"][0]["cluster_id"] == 0
     assert loaded["clusters"][1]["cluster_id"] == 1
 
 
-def test_clusters_have_similarity_pairs(tmp_path):
+def test_clusters_have_similarity_pairs(roundtrip):
     """Verify clusters have similarity_pairs field with pairwise similarities."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [],
-        "marketplace_index": {},
-        "filename_index": {},
-        "clusters": [
+    report = _report(
+        clusters=[
             {
                 "cluster_id": 0,
                 "type": "internal",
@@ -235,14 +188,9 @@ def test_clusters_have_similarity_pairs(tmp_path):
                 ],
             },
         ],
-    }
-
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
+    )
 
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(report)
 
     cluster = loaded["clusters"][0]
     assert "similarity_pairs" in cluster
@@ -255,15 +203,10 @@ def test_clusters_have_similarity_pairs(tmp_path):
     assert "similarity" in pair
 
 
-def test_locations_have_file_index(tmp_path):
+def test_locations_have_file_index(roundtrip):
     """Verify cluster locations include file_index reference."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [],
-        "marketplace_index": {},
-        "filename_index": {},
-        "clusters": [
+    report = _report(
+        clusters=[
             {
                 "cluster_id": 0,
                 "type": "internal",
@@ -290,14 +233,9 @@ def test_locations_have_file_index(tmp_path):
                 "similarity_pairs": [],
             },
         ],
-    }
-
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
+    )
 
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(report)
 
     cluster = loaded["clusters"][0]
     for location in cluster["locations"]:
@@ -305,31 +243,22 @@ def test_locations_have_file_index(tmp_path):
         assert isinstance(location["file_index"], int)
 
 
-def test_jq_query_clusters_by_marketplace(tmp_path):
+def test_jq_query_clusters_by_marketplace(roundtrip):
     """Test jq query: get all clusters for a specific marketplace."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [],
-        "marketplace_index": {
+    report = _report(
+        marketplace_index={
             "marketplace-a": [0, 2],
             "marketplace-b": [1],
         },
-        "filename_index": {},
-        "clusters": [
+        clusters=[
             {"cluster_id": 0, "type": "internal", "size": 3, "marketplaces": ["marketplace-a"]},
             {"cluster_id": 1, "type": "internal", "size": 2, "marketplaces": ["marketplace-b"]},
             {"cluster_id": 2, "type": "cross-marketplace", "size": 5, "marketplaces": ["marketplace-a", "marketplace-b"]},
         ],
-    }
-
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
+    )
 
     # Simulate jq query: .marketplace_index["marketplace-a"]
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(report)
 
     cluster_ids = loaded["marketplace_index"]["marketplace-a"]
     assert cluster_ids == [0, 2]
@@ -341,28 +270,18 @@ def test_jq_query_clusters_by_marketplace(tmp_path):
     assert clusters[1]["cluster_id"] == 2
 
 
-def test_jq_query_files_by_marketplace(tmp_path):
+def test_jq_query_files_by_marketplace(roundtrip):
     """Test jq query: get all files for a specific marketplace."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [
+    report = _report(
+        file_index=[
             {"file_index": 0, "marketplace": "mp-a", "plugin": "p1", "path": "f1.md"},
             {"file_index": 1, "marketplace": "mp-b", "plugin": "p2", "path": "f2.md"},
             {"file_index": 2, "marketplace": "mp-a", "plugin": "p3", "path": "f3.md"},
         ],
-        "marketplace_index": {},
-        "filename_index": {},
-        "clusters": [],
-    }
-
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
+    )
 
     # Simulate jq query: .file_index[] | select(.marketplace == "mp-a")
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(report)
 
     files = [f for f in loaded["file_index"] if f["marketplace"] == "mp-a"]
     assert len(files) == 2
@@ -370,15 +289,10 @@ def test_jq_query_files_by_marketplace(tmp_path):
     assert files[1]["file_index"] == 2
 
 
-def test_jq_query_top_similarities(tmp_path):
+def test_jq_query_top_similarities(roundtrip):
     """Test jq query: get top N similarity pairs."""
-    report = {
-        "metadata": {"version": "2.0"},
-        "summary": {},
-        "file_index": [],
-        "marketplace_index": {},
-        "filename_index": {},
-        "clusters": [
+    report = _report(
+        clusters=[
             {
                 "cluster_id": 0,
                 "type": "internal",
@@ -397,15 +311,10 @@ def test_jq_query_top_similarities(tmp_path):
                 ],
             },
         ],
-    }
-
-    report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f)
+    )
 
     # Simulate jq query: [.clusters[].similarity_pairs[]] | sort_by(.similarity) | reverse
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(report)
 
     all_pairs = []
     for cluster in loaded["clusters"]:
@@ -420,16 +329,9 @@ def test_jq_query_top_similarities(tmp_path):
 
 def test_json_schema_compliance(tmp_path):
     """Verify JSON structure follows schema best practices."""
-    report = {
-        "metadata": {
-            "version": "2.0",
-            "generated_at": "2025-01-17T12:00:00Z",
-            "similarity_threshold": 0.7,
-            "num_permutations": 128,
-            "confidence": "high",
-            "warnings": [],
-        },
-        "summary": {
+    report = _report(
+        metadata=_FULL_METADATA,
+        summary={
             "total_files_scanned": 100,
             "files_in_clusters": 60,
             "unclustered_files": 40,
@@ -441,19 +343,15 @@ def test_json_schema_compliance(tmp_path):
                 "scaffold": {"clusters": 1, "files": 5},
             },
         },
-        "file_index": [],
-        "marketplace_index": {},
-        "filename_index": {},
-        "clusters": [],
-    }
+    )
 
+    # The one test that goes through the filesystem, with the writer and
+    # loader the CLI uses
     report_path = tmp_path / "test_report.json"
-    with open(report_path, "w") as f:
-        json.dump(report, f, indent=2)
+    core.write_json(report_path, report)
 
     # Verify file is valid JSON
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = core.read_json(report_path)
 
     # Verify top-level keys
     assert set(loaded.keys()) == {
@@ -486,7 +384,7 @@ def test_json_schema_compliance(tmp_path):
     assert isinstance(loaded["clusters"], list)
 
 
-def test_backward_compatibility_with_old_format(tmp_path):
+def test_backward_compatibility_with_old_format(roundtrip):
     """Verify old JSON format can still be read (backward compatibility)."""
     # Old format (without metadata, file_index, etc.)
     old_report = {
@@ -520,16 +418,97 @@ def test_backward_compatibility_with_old_format(tmp_path):
         ],
     }
 
-    report_path = tmp_path / "old_report.json"
-    with open(report_path, "w") as f:
-        json.dump(old_report, f)
-
     # Verify it can be loaded
-    with open(report_path) as f:
-        loaded = json.load(f)
+    loaded = roundtrip(old_report)
 
     assert "summary" in loaded
     assert "clusters" in loaded
     # Old format doesn't have these, but loading shouldn't fail
     assert "metadata" not in loaded
     assert "file_index" not in loaded
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_write_json_matches_stdlib_indent(tmp_path, monkeypatch, use_orjson):
+    """write_json writes json.dump(indent=2) bytes, escapes included, with or without orjson."""
+    if use_orjson and core.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(core, "orjson", None)
+
+    report = {
+        "summary": {"total_files_scanned": 2},
+        "marketplace_index": {"mp1": [0, 1]},
+        "file_index": [],
+        "clusters": [
+            {"cluster_id": 0, "avg_similarity": 0.938, "locations": []},
+            {"cluster_id": 1, "marketplaces": ["mp1", "mp2"], "locations": [{"path": "a\nb.md"}]},
+            {"cluster_id": 2, "locations": [{"path": "café/日本.md", "note": "ok 🙂\x7f"}]},
+        ],
+        "filename_index": {"résumé.md": [2]},
+    }
+    report_path = tmp_path / "report.json"
+
+    core.write_json(report_path, report)
+
+    assert report_path.read_bytes() == json.dumps(report, indent=2).encode("ascii")
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_write_json_coerces_keys_like_stdlib(tmp_path, monkeypatch, use_orjson):
+    """Non-str top-level keys are written as json.dump writes them, or rejected."""
+    if use_orjson and core.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(core, "orjson", None)
+
+    data = {True: [1], False: 0, None: {"a": 1}, 3: "x", 1.5: [], "name": "ok"}
+    report_path = tmp_path / "report.json"
+
+    core.write_json(report_path, data)
+
+    assert report_path.read_bytes() == json.dumps(data, indent=2).encode("ascii")
+
+    with pytest.raises(TypeError):
+        core.write_json(report_path, {(1, 2): "pair"})
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_json_matches_stdlib_indent(monkeypatch, use_orjson):
+    """dumps_json output matches json.dumps(indent=2) with or without orjson."""
+    if use_orjson and core.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(core, "orjson", None)
+
+    output = {
+        "marketplace_a": {"name": "mp1", "total_files": 2, "unique_files": 1},
+        "overlap": {"shared_count": 1, "a_overlap_percentage": 50.0},
+        "top_overlaps": [{"file_a": "a.md", "file_b": "b.md", "similarity": 0.969}],
+        "empty": [],
+        "descriptions": {"café": "Ünïcödé — 日本語 🙂\x7f"},
+    }
+
+    text = core.dumps_json(output)
+
+    assert text == json.dumps(output, indent=2)
+    assert text.isascii()
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_read_json_roundtrip_and_errors(tmp_path, monkeypatch, use_orjson):
+    """read_json loads write_json output and raises JSONDecodeError on bad input."""
+    if use_orjson and core.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(core, "orjson", None)
+
+    report = {"summary": {"unique_clusters": 2}, "clusters": [{"cluster_id": 0, "path": "é.md"}]}
+    report_path = tmp_path / "report.json"
+    core.write_json(report_path, report)
+
+    assert core.read_json(report_path) == report
+
+    report_path.write_text('{"summary": ')
+    with pytest.raises(json.JSONDecodeError):
+        core.read_json(report_path)
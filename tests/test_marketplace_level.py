@@ -2,16 +2,15 @@
 """Tests for marketplace-level similarity analysis."""
 
 import json
-import os
 import sys
-import tempfile
-from pathlib import Path
-from unittest.mock import Mock, patch
+from collections import defaultdict
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "plugin"))
+import numpy as np
+import pytest
 
-from librarian.cli import cmd_marketplace_level
+from librarian.cli import _popcount_rows, cmd_marketplace_level
 
 
 def create_mock_report(marketplaces_data):
@@ -47,15 +46,15 @@ def create_mock_report(marketplaces_data):
     # Build marketplace index
     marketplace_index = marketplaces_data.copy()
 
-    # Build clusters
-    all_cluster_ids = set()
-    for ids in marketplaces_data.values():
-        all_cluster_ids.update(ids)
+    # Build clusters from an inverse cluster -> marketplaces index
+    cluster_marketplaces = defaultdict(list)
+    for mp, ids in marketplaces_data.items():
+        for cid in ids:
+            cluster_marketplaces[cid].append(mp)
 
     clusters = []
-    for cid in sorted(all_cluster_ids):
-        # Find which marketplaces have this cluster
-        mps = [mp for mp, ids in marketplaces_data.items() if cid in ids]
+    for cid in sorted(cluster_marketplaces):
+        mps = cluster_marketplaces[cid]
         clusters.append({
             "cluster_id": cid,
             "type": "cross-marketplace" if len(mps) > 1 else "internal",
@@ -84,112 +83,107 @@ def create_mock_report(marketplaces_data):
     }
 
 
-def run_with_mock_report(report, args):
-    """Run cmd_marketplace_level with a mock report, handling temp file cleanup.
+def write_report(path, report):
+    """Write a report as compact JSON; nothing here depends on indentation."""
+    path.write_text(json.dumps(report, separators=(",", ":")))
 
-    Returns:
-        List of print call arguments
+
+@pytest.fixture(scope="session")
+def mock_report_path(tmp_path_factory):
+    """Return a factory mapping marketplace data to a serialized report path.
+
+    Each distinct marketplaces_data is written to disk once per session and
+    the path is reused by every test that asks for the same shape.
     """
-    with tempfile.TemporaryDirectory() as tmpdir:
-        report_path = Path(tmpdir) / "report.json"
-        with open(report_path, 'w') as f:
-            json.dump(report, f)
+    paths = {}
 
-        with patch('librarian.cli.SIMILARITY_REPORT', report_path):
-            with patch('builtins.print') as mock_print:
-                cmd_marketplace_level(args)
-                return mock_print.call_args_list
+    def path_for(marketplaces_data):
+        key = tuple((mp, tuple(ids)) for mp, ids in marketplaces_data.items())
+        if key not in paths:
+            path = tmp_path_factory.mktemp("report") / "report.json"
+            write_report(path, create_mock_report(marketplaces_data))
+            paths[key] = path
+        return paths[key]
 
+    return path_for
+
+
+def run_with_path(report_path, args, capsys):
+    """Run cmd_marketplace_level against a report already written to disk.
+
+    Returns:
+        Everything the command wrote to stdout
+    """
+    capsys.readouterr()
+    with patch('librarian.cli.SIMILARITY_REPORT', report_path):
+        cmd_marketplace_level(args)
+    return capsys.readouterr().out
 
-def test_identical_marketplaces():
-    """Test marketplaces with identical cluster membership (100% Jaccard)."""
-    print("Testing identical marketplaces...")
 
+def test_identical_marketplaces(mock_report_path, capsys):
+    """Test marketplaces with identical cluster membership (100% Jaccard)."""
     # Both marketplaces have the same clusters
-    report = create_mock_report({
+    report_path = mock_report_path({
         "mp-a": [0, 1, 2],
         "mp-b": [0, 1, 2],
     })
 
-    args = Mock()
-    args.json = True
-    args.heatmap = False
-
-    call_list = run_with_mock_report(report, args)
+    args = SimpleNamespace(json=True, heatmap=False)
 
-    # Get the JSON output (last print call)
-    output = call_list[-1][0][0]
+    output = run_with_path(report_path, args, capsys)
     result = json.loads(output)
 
     # Check that mp-a and mp-b have 100% similarity
     assert result["similarity_matrix"]["mp-a"]["mp-b"] == 1.0
     assert result["similarity_matrix"]["mp-b"]["mp-a"] == 1.0
-    print("[PASS] Identical marketplaces have 100% similarity")
 
 
-def test_disjoint_marketplaces():
+def test_disjoint_marketplaces(mock_report_path, capsys):
     """Test marketplaces with no shared clusters (0% Jaccard)."""
-    print("Testing disjoint marketplaces...")
-
     # Different clusters for each marketplace
-    report = create_mock_report({
+    report_path = mock_report_path({
         "mp-a": [0, 1, 2],
         "mp-b": [3, 4, 5],
     })
 
-    args = Mock()
-    args.json = True
-    args.heatmap = False
+    args = SimpleNamespace(json=True, heatmap=False)
 
-    call_list = run_with_mock_report(report, args)
-    output = call_list[-1][0][0]
+    output = run_with_path(report_path, args, capsys)
     result = json.loads(output)
 
     # Check that mp-a and mp-b have 0% similarity
     assert result["similarity_matrix"]["mp-a"]["mp-b"] == 0.0
     assert result["similarity_matrix"]["mp-b"]["mp-a"] == 0.0
-    print("[PASS] Disjoint marketplaces have 0% similarity")
 
 
-def test_partial_overlap():
+def test_partial_overlap(mock_report_path, capsys):
     """Test marketplaces with partial cluster overlap."""
-    print("Testing partial overlap...")
-
     # Shared clusters 1, 2; mp-a has 0, mp-b has 3
-    report = create_mock_report({
+    report_path = mock_report_path({
         "mp-a": [0, 1, 2],      # 3 clusters
         "mp-b": [1, 2, 3],      # 3 clusters, 2 shared
     })
 
-    args = Mock()
-    args.json = True
-    args.heatmap = False
+    args = SimpleNamespace(json=True, heatmap=False)
 
-    call_list = run_with_mock_report(report, args)
-    output = call_list[-1][0][0]
+    output = run_with_path(report_path, args, capsys)
     result = json.loads(output)
 
     # Jaccard = |intersection| / |union| = 2 / 4 = 0.5
     assert result["similarity_matrix"]["mp-a"]["mp-b"] == 0.5
-    print("[PASS] Partial overlap calculates correct Jaccard similarity")
 
 
-def test_matrix_symmetry():
+def test_matrix_symmetry(mock_report_path, capsys):
     """Test that similarity matrix is symmetric."""
-    print("Testing matrix symmetry...")
-
-    report = create_mock_report({
+    report_path = mock_report_path({
         "mp-a": [0, 1, 2],
         "mp-b": [1, 2, 3],
         "mp-c": [2, 3, 4],
     })
 
-    args = Mock()
-    args.json = True
-    args.heatmap = False
+    args = SimpleNamespace(json=True, heatmap=False)
 
-    call_list = run_with_mock_report(report, args)
-    output = call_list[-1][0][0]
+    output = run_with_path(report_path, args, capsys)
     result = json.loads(output)
 
     matrix = result["similarity_matrix"]
@@ -201,24 +195,17 @@ def test_matrix_symmetry():
             assert matrix[mp_a][mp_b] == matrix[mp_b][mp_a], \
                 f"Matrix not symmetric: [{mp_a}][{mp_b}] != [{mp_b}][{mp_a}]"
 
-    print("[PASS] Similarity matrix is symmetric")
 
-
-def test_diagonal_is_one():
+def test_diagonal_is_one(mock_report_path, capsys):
     """Test that diagonal elements are 1.0 (self-similarity)."""
-    print("Testing diagonal is 1.0...")
-
-    report = create_mock_report({
+    report_path = mock_report_path({
         "mp-a": [0, 1],
         "mp-b": [2, 3],
     })
 
-    args = Mock()
-    args.json = True
-    args.heatmap = False
+    args = SimpleNamespace(json=True, heatmap=False)
 
-    call_list = run_with_mock_report(report, args)
-    output = call_list[-1][0][0]
+    output = run_with_path(report_path, args, capsys)
     result = json.loads(output)
 
     matrix = result["similarity_matrix"]
@@ -227,24 +214,17 @@ def test_diagonal_is_one():
     for mp in result["marketplaces"]:
         assert matrix[mp][mp] == 1.0, f"Diagonal not 1.0 for {mp}"
 
-    print("[PASS] Diagonal elements are 1.0")
 
-
-def test_text_output():
+def test_text_output(mock_report_path, capsys):
     """Test text output format."""
-    print("Testing text output...")
-
-    report = create_mock_report({
+    report_path = mock_report_path({
         "mp-a": [0, 1, 2],
         "mp-b": [1, 2, 3],
     })
 
-    args = Mock()
-    args.json = False
-    args.heatmap = False
+    args = SimpleNamespace(json=False, heatmap=False)
 
-    call_list = run_with_mock_report(report, args)
-    output = " ".join(str(call.args[0]) if call.args else "" for call in call_list)
+    output = run_with_path(report_path, args, capsys)
 
     # Check expected content
     assert "MARKETPLACE SIMILARITY MATRIX" in output
@@ -252,50 +232,36 @@ def test_text_output():
     assert "mp-a" in output
     assert "mp-b" in output
 
-    print("[PASS] Text output contains expected content")
 
-
-def test_heatmap_output():
+def test_heatmap_output(mock_report_path, capsys):
     """Test heatmap visualization."""
-    print("Testing heatmap output...")
-
-    report = create_mock_report({
+    report_path = mock_report_path({
         "mp-a": [0, 1, 2],
         "mp-b": [0, 1, 2],  # 100% overlap
         "mp-c": [3, 4, 5],  # 0% overlap with a, b
     })
 
-    args = Mock()
-    args.json = False
-    args.heatmap = True
+    args = SimpleNamespace(json=False, heatmap=True)
 
-    call_list = run_with_mock_report(report, args)
-    output = " ".join(str(call.args[0]) if call.args else "" for call in call_list)
+    output = run_with_path(report_path, args, capsys)
 
     # Check heatmap legend
     assert "Legend" in output
     assert "██" in output or "Heatmap" in output
 
-    print("[PASS] Heatmap output generated")
-
 
-def test_top_pairs_sorted():
+def test_top_pairs_sorted(mock_report_path, capsys):
     """Test that top pairs are sorted by similarity."""
-    print("Testing top pairs sorting...")
-
-    report = create_mock_report({
+    report_path = mock_report_path({
         "mp-a": [0, 1, 2, 3],
         "mp-b": [0, 1, 2, 3],  # 100% overlap with a
         "mp-c": [2, 3],        # 50% overlap with a (2/4)
         "mp-d": [5, 6],        # 0% overlap with a
     })
 
-    args = Mock()
-    args.json = True
-    args.heatmap = False
+    args = SimpleNamespace(json=True, heatmap=False)
 
-    call_list = run_with_mock_report(report, args)
-    output = call_list[-1][0][0]
+    output = run_with_path(report_path, args, capsys)
     result = json.loads(output)
 
     top_pairs = result["top_pairs"]
@@ -308,36 +274,24 @@ def test_top_pairs_sorted():
     # The highest similarity pair should be mp-a/mp-b (100%)
     assert top_pairs[0]["similarity"] == 1.0
 
-    print("[PASS] Top pairs sorted correctly")
-
 
-def test_no_index_error():
+def test_no_index_error(tmp_path, capsys):
     """Test error handling when no index exists."""
-    print("Testing no index error...")
+    args = SimpleNamespace(json=False, heatmap=False)
 
-    args = Mock()
-    args.json = False
-    args.heatmap = False
+    nonexistent = tmp_path / "nonexistent.json"
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        nonexistent = Path(tmpdir) / "nonexistent.json"
+    with patch('librarian.cli.SIMILARITY_REPORT', nonexistent):
+        with pytest.raises(SystemExit) as excinfo:
+            cmd_marketplace_level(args)
 
-        with patch('librarian.cli.SIMILARITY_REPORT', nonexistent):
-            with patch('builtins.print') as mock_print:
-                try:
-                    cmd_marketplace_level(args)
-                    assert False, "Should have exited"
-                except SystemExit as e:
-                    assert e.code == 1
-                    output = " ".join(str(call.args[0]) if call.args else "" for call in mock_print.call_args_list)
-                    assert "Error" in output or "Index not found" in output
-                    print("[PASS] Missing index handled correctly")
+    assert excinfo.value.code == 1
+    output = capsys.readouterr().out
+    assert "Error" in output or "Index not found" in output
 
 
-def test_old_format_fallback():
+def test_old_format_fallback(tmp_path, capsys):
     """Test fallback for old JSON format (no metadata/indices)."""
-    print("Testing old format fallback...")
-
     # Old format report
     old_report = {
         "summary": {
@@ -369,12 +323,12 @@ def test_old_format_fallback():
         ],
     }
 
-    args = Mock()
-    args.json = True
-    args.heatmap = False
+    args = SimpleNamespace(json=True, heatmap=False)
+
+    report_path = tmp_path / "report.json"
+    write_report(report_path, old_report)
 
-    call_list = run_with_mock_report(old_report, args)
-    output = call_list[-1][0][0]
+    output = run_with_path(report_path, args, capsys)
     result = json.loads(output)
 
     # Should have found both marketplaces
@@ -385,21 +339,22 @@ def test_old_format_fallback():
     # Jaccard = 1 / 2 = 0.5
     assert result["similarity_matrix"]["mp-a"]["mp-b"] == 0.5
 
-    print("[PASS] Old format fallback works correctly")
+
+@pytest.mark.parametrize("native", [True, False], ids=["bitwise_count", "unpackbits"])
+def test_popcount_rows(monkeypatch, native):
+    """Row popcounts match bin().count() with and without np.bitwise_count."""
+    if native and not hasattr(np, "bitwise_count"):
+        pytest.skip("np.bitwise_count requires NumPy 2.0")
+    if not native:
+        monkeypatch.delattr(np, "bitwise_count", raising=False)
+
+    words = np.array(
+        [[0, 1, 2**64 - 1], [2**63, 0b1011, 0], [0, 0, 0]], dtype=np.uint64
+    )
+    expected = [sum(bin(int(w)).count("1") for w in row) for row in words]
+
+    assert _popcount_rows(words).tolist() == expected
 
 
 if __name__ == "__main__":
-    print("Running marketplace-level tests...\n")
-
-    test_identical_marketplaces()
-    test_disjoint_marketplaces()
-    test_partial_overlap()
-    test_matrix_symmetry()
-    test_diagonal_is_one()
-    test_text_output()
-    test_heatmap_output()
-    test_top_pairs_sorted()
-    test_no_index_error()
-    test_old_format_fallback()
-
-    print("\n[PASS] All marketplace-level tests passed!")
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,273 @@
+"""Tests for content discovery and clustering used by the similarity scan."""
+
+import numpy as np
+import pytest
+from datasketch import MinHashLSH
+
+from librarian import core
+from librarian.core import (
+    FileInfo,
+    build_lsh_index,
+    compute_content_minhash,
+    compute_minhash,
+    find_clusters,
+    find_content_files,
+    iter_markdown_files,
+    load_signature_cache,
+    mean_pairwise_jaccard,
+    tokenize,
+)
+
+
+LONG_TEXT = "Content long enough to pass the minimum length filter. " * 5
+
+# Synthetic bodies shared by the clustering tests
+WORDS = [f"word{i}" for i in range(200)]
+WORDS_TEXT = " ".join(WORDS)
+OTHER_TEXT = " ".join(f"other{i}" for i in range(200))
+
+
+def test_iter_markdown_files_skips_backups(tmp_path):
+    """Backup directories and backup files are never yielded."""
+    (tmp_path / "skills").mkdir()
+    (tmp_path / "skills" / "keep.md").write_text("x")
+    (tmp_path / "skills" / "keep-backup.md").write_text("x")
+    (tmp_path / "backup-2024").mkdir()
+    (tmp_path / "backup-2024" / "old.md").write_text("x")
+    (tmp_path / "notes.txt").write_text("x")
+
+    found = sorted(p.relative_to(tmp_path).as_posix() for p in iter_markdown_files(tmp_path))
+
+    assert found == ["skills/keep.md"]
+
+
+def test_iter_markdown_files_backup_root(tmp_path):
+    """A root directory inside a backup path yields nothing."""
+    root = tmp_path / "Backup"
+    root.mkdir()
+    (root / "a.md").write_text("x")
+
+    assert list(iter_markdown_files(root)) == []
+
+
+def test_find_content_files_plugin_names(tmp_path):
+    """Plugin names come from plugins/<name>/ or the top-level directory."""
+    nested = tmp_path / "mp-a" / "plugins" / "nested-plugin" / "skills"
+    nested.mkdir(parents=True)
+    (nested / "a.md").write_text(LONG_TEXT)
+    flat = tmp_path / "mp-b" / "flat-plugin" / "agents"
+    flat.mkdir(parents=True)
+    (flat / "b.md").write_text(LONG_TEXT)
+    (tmp_path / "mp-b" / "README.md").write_text(LONG_TEXT)
+    (tmp_path / "mp-b" / "short.md").write_text("too short")
+    (tmp_path / ".hidden-mp").mkdir()
+    (tmp_path / ".hidden-mp" / "c.md").write_text(LONG_TEXT)
+
+    files = find_content_files(tmp_path)
+    by_path = {(f.marketplace, f.relative_path): f.plugin for f in files}
+
+    assert by_path == {
+        ("mp-a", "plugins/nested-plugin/skills/a.md"): "nested-plugin",
+        ("mp-b", "flat-plugin/agents/b.md"): "flat-plugin",
+        ("mp-b", "README.md"): "root",
+    }
+    assert all(f.content == LONG_TEXT for f in files)
+    assert all(f.minhash is None for f in files)
+
+
+def _make_file(marketplace, plugin, content):
+    return FileInfo(
+        marketplace=marketplace,
+        plugin=plugin,
+        relative_path=f"plugins/{plugin}/SKILL.md",
+        full_path=f"/mp/{marketplace}/plugins/{plugin}/SKILL.md",
+        content=content,
+    )
+
+
+def test_find_clusters_groups_near_duplicates():
+    """Identical files cluster together; files without shingles are skipped."""
+    files = [
+        _make_file("mp1", "alpha", WORDS_TEXT),
+        _make_file("mp2", "beta", WORDS_TEXT),
+        _make_file("mp1", "gamma", OTHER_TEXT),
+        _make_file("mp1", "tiny", "!!!"),
+    ]
+
+    lsh, empty_shingles = build_lsh_index(files)
+    clusters, file_to_cluster = find_clusters(files, lsh)
+
+    assert empty_shingles == ["mp1/tiny/plugins/tiny/SKILL.md"]
+    assert len(clusters) == 1
+    cluster = clusters[0]
+    assert cluster["type"] == "cross-marketplace"
+    assert [loc["file_index"] for loc in cluster["locations"]] == [0, 1]
+    assert cluster["similarity_pairs"] == [
+        {"file1_index": 0, "file2_index": 1, "similarity": 1.0}
+    ]
+    assert file_to_cluster == {0: 0, 1: 0}
+
+
+def test_find_clusters_rejects_unverified_candidates():
+    """LSH candidates below the similarity threshold are not clustered."""
+    files = [
+        _make_file("mp1", "alpha", WORDS_TEXT),
+        _make_file("mp2", "beta", OTHER_TEXT),
+    ]
+    lsh, _ = build_lsh_index(files)
+
+    # Simulate an LSH false positive: both files land in every bucket query
+    class AllCandidates:
+        def query(self, minhash):
+            return ["0", "1"]
+
+    clusters, file_to_cluster = find_clusters(files, AllCandidates())
+
+    assert clusters == []
+    assert file_to_cluster == {}
+
+
+def test_build_lsh_index_parallel_matches_serial(monkeypatch):
+    """Hashing in worker processes yields the same signatures as in-process."""
+    monkeypatch.setattr(core, "PARALLEL_MIN_FILES", 0)
+    contents = [" ".join(f"word{i * j}" for j in range(100)) for i in range(6)] + ["!!!"]
+
+    serial = [_make_file("mp1", f"p{i}", c) for i, c in enumerate(contents)]
+    parallel = [_make_file("mp1", f"p{i}", c) for i, c in enumerate(contents)]
+
+    _, serial_empty = build_lsh_index(serial, processes=1)
+    _, parallel_empty = build_lsh_index(parallel, processes=2)
+
+    assert serial_empty == parallel_empty == ["mp1/p6/plugins/p6/SKILL.md"]
+    for a, b in zip(serial, parallel):
+        if a.minhash is None:
+            assert b.minhash is None
+        else:
+            assert a.minhash == b.minhash
+
+
+def test_mean_pairwise_jaccard_matches_pairwise_average():
+    """The counting shortcut equals averaging jaccard() over every pair."""
+    contents = [
+        " ".join(f"word{j % (20 + i)}" for j in range(80)) for i in range(7)
+    ]
+    minhashes = [compute_minhash(tokenize(c)) for c in contents]
+    pairs = [
+        a.jaccard(b)
+        for i, a in enumerate(minhashes)
+        for b in minhashes[i + 1:]
+    ]
+
+    assert mean_pairwise_jaccard(minhashes) == pytest.approx(sum(pairs) / len(pairs))
+    assert mean_pairwise_jaccard(minhashes[:1]) == 0.0
+
+
+def test_build_lsh_index_shares_identical_signatures():
+    """Byte-identical files are hashed and indexed once but still cluster."""
+    files = [_make_file("mp1", f"p{i}", WORDS_TEXT) for i in range(3)]
+
+    lsh, _ = build_lsh_index(files, processes=1)
+
+    assert files[0].minhash is files[1].minhash is files[2].minhash
+    # Only the first copy is indexed
+    assert "0" in lsh and "1" not in lsh and "2" not in lsh
+
+    clusters, _ = find_clusters(files, lsh)
+    assert [loc["file_index"] for loc in clusters[0]["locations"]] == [0, 1, 2]
+
+
+def test_build_lsh_index_signature_cache(tmp_path, monkeypatch):
+    """Cached signatures are reused and stale entries are pruned."""
+    cache_path = tmp_path / "signature_cache.npz"
+    first = [
+        _make_file("mp1", "alpha", WORDS_TEXT),
+        _make_file("mp1", "beta", OTHER_TEXT),
+    ]
+    build_lsh_index(first, processes=1, cache_path=cache_path)
+    assert len(load_signature_cache(cache_path)) == 2
+
+    def fail(content):
+        raise AssertionError("cached content was rehashed")
+
+    monkeypatch.setattr(core, "_signature", fail)
+    second = [_make_file("mp1", "alpha", first[0].content)]
+    build_lsh_index(second, processes=1, cache_path=cache_path)
+
+    assert second[0].minhash == first[0].minhash
+    assert len(load_signature_cache(cache_path)) == 1
+
+
+def test_load_signature_cache_rejects_other_versions(tmp_path, monkeypatch):
+    """Caches written with other signature parameters are ignored."""
+    cache_path = tmp_path / "signature_cache.npz"
+    files = [_make_file("mp1", "alpha", WORDS_TEXT)]
+    build_lsh_index(files, processes=1, cache_path=cache_path)
+
+    monkeypatch.setattr(core, "SIGNATURE_VERSION", core.SIGNATURE_VERSION + 1)
+
+    assert load_signature_cache(cache_path) == {}
+    assert load_signature_cache(tmp_path / "missing.npz") == {}
+
+
+def test_find_clusters_merges_transitive_matches():
+    """A~B and B~C cluster together even when A and C are not similar."""
+    files = [
+        _make_file("mp1", name, " ".join(WORDS[start:start + 100]))
+        for name, start in (("a", 0), ("b", 12), ("c", 24))
+    ]
+    build_lsh_index(files, processes=1)
+    assert files[0].minhash.jaccard(files[2].minhash) < core.SIMILARITY_THRESHOLD
+
+    # A and C never see each other as LSH candidates; only B links them
+    neighbors = {
+        id(f.minhash): candidates
+        for f, candidates in zip(files, (["0", "1"], ["0", "1", "2"], ["1", "2"]))
+    }
+
+    class ChainedCandidates:
+        def query(self, minhash):
+            return neighbors[id(minhash)]
+
+    clusters, file_to_cluster = find_clusters(files, ChainedCandidates())
+
+    assert len(clusters) == 1
+    assert [loc["file_index"] for loc in clusters[0]["locations"]] == [0, 1, 2]
+    assert file_to_cluster == {0: 0, 1: 0, 2: 0}
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "!!",
+    "one",
+    "two words",
+    "---\nname: skill\n---\n# Heading\n\nSome body text, repeated. Some body text, repeated.",
+    "Ünïcödé text — with dashes-and punctuation!",
+])
+def test_compute_content_minhash_matches_tokenize(text):
+    """The fused path produces the same signature as tokenize + compute_minhash."""
+    shingles = tokenize(text)
+    expected = compute_minhash(shingles) if shingles else None
+
+    assert compute_content_minhash(text) == expected
+
+
+def test_scan_lsh_recall_at_threshold():
+    """Pairs at or above the threshold are LSH candidates with high probability."""
+    lsh, _ = build_lsh_index([])
+
+    s = np.linspace(0.5, 1.0, 1001)
+    prob = 1 - (1 - s ** lsh.r) ** lsh.b
+
+    assert prob[np.searchsorted(s, core.SIMILARITY_THRESHOLD):].min() > 0.9
+    # Well-separated pairs should still mostly be filtered out by banding
+    assert prob[s <= 0.5].max() < 0.3
+
+
+@pytest.mark.parametrize("weights", sorted(core._PRECOMPUTED_LSH_PARAMS))
+def test_precomputed_lsh_params_match_optimizer(weights):
+    """Hardcoded band splits stay in sync with the threshold and NUM_PERM."""
+    lsh = MinHashLSH(
+        threshold=core.SIMILARITY_THRESHOLD, num_perm=core.NUM_PERM, weights=weights
+    )
+
+    assert core._PRECOMPUTED_LSH_PARAMS[weights] == (lsh.b, lsh.r)
@@ -3,12 +3,10 @@
 
 import json
 import sys
-import tempfile
-from pathlib import Path
 
-# Add parent directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / "plugin"))
+import pytest
 
+from librarian import cli, core
 from librarian.core import Capability
 from librarian.cli import (
     save_capability_index,
@@ -16,10 +14,18 @@ from librarian.cli import (
 )
 
 
-def test_capability_matching():
-    """Test capability matching with various query patterns."""
-    # Create test capability
-    cap = Capability(
+@pytest.fixture
+def index_path(tmp_path, monkeypatch):
+    """Point CAPABILITY_INDEX at a fresh, not yet existing file for one test."""
+    path = tmp_path / "capabilities.json"
+    monkeypatch.setattr(cli, "CAPABILITY_INDEX", path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def git_cap():
+    """Git workflow skill with name, description and trigger matches."""
+    return Capability(
         name="git-helper",
         kind="skill",
         description="Provides Git workflow assistance including commit, push, and branch management",
@@ -29,6 +35,38 @@ def test_capability_matching():
         triggers=["git commit", "git push", "create branch"],
     )
 
+
+@pytest.fixture(scope="module")
+def pdf_cap():
+    """PDF skill used by the query variation table."""
+    return Capability(
+        name="pdf-tools",
+        kind="skill",
+        description="Tools for reading, writing, and editing PDF documents",
+        marketplace="test",
+        plugin="test",
+        path="skills/pdf-tools.md",
+        triggers=["create pdf", "edit pdf"],
+    )
+
+
+@pytest.fixture(scope="module")
+def spreadsheet_cap():
+    """Skill without triggers, for comparing name and description scores."""
+    return Capability(
+        name="spreadsheet",
+        kind="skill",
+        description="Work with CSV files and Excel documents",
+        marketplace="test",
+        plugin="test",
+        path="skills/spreadsheet.md",
+    )
+
+
+def test_capability_matching(git_cap):
+    """Test capability matching with various query patterns."""
+    cap = git_cap
+
     # Test exact name match
     matches, score = cap.matches("git")
     assert matches, "Should match 'git' in name"
@@ -54,8 +92,6 @@ def test_capability_matching():
     assert not matches, "Should not match unrelated query"
     assert score == 0, "Should have zero score for non-match"
 
-    print("✓ Capability matching works correctly")
-
 
 def test_ranking_by_relevance():
     """Test that results are ranked by relevance."""
@@ -105,10 +141,8 @@ def test_ranking_by_relevance():
     # Scores should be positive
     assert all(score > 0 for _, score in results)
 
-    print("✓ Ranking by relevance works correctly")
 
-
-def test_save_and_load_capability_index():
+def test_save_and_load_capability_index(index_path):
     """Test saving and loading capability index."""
     # Create test capabilities
     capabilities = [
@@ -132,147 +166,86 @@ def test_save_and_load_capability_index():
         ),
     ]
 
-    # Save to temporary file
-    with tempfile.TemporaryDirectory() as tmpdir:
-        index_path = Path(tmpdir) / "test_index.json"
-
-        # Monkey-patch CAPABILITY_INDEX
-        import librarian.cli as cli_module
-        original_path = cli_module.CAPABILITY_INDEX
-        cli_module.CAPABILITY_INDEX = index_path
-
-        try:
-            # Save
-            save_capability_index(capabilities)
-            assert index_path.exists(), "Index file should be created"
-
-            # Verify JSON structure
-            with open(index_path) as fh:
-                data = json.load(fh)
-
-            assert "capabilities" in data
-            assert "metadata" in data
-            assert data["metadata"]["total_count"] == 2
-            assert data["metadata"]["skills"] == 1
-            assert data["metadata"]["agents"] == 1
-            assert len(data["capabilities"]) == 2
-
-            # Load
-            loaded = load_capability_index()
-            assert len(loaded) == 2, "Should load all capabilities"
-
-            # Verify first capability
-            cap1 = loaded[0]
-            assert cap1.name == "skill-one"
-            assert cap1.kind == "skill"
-            assert cap1.description == "First test skill"
-            assert cap1.marketplace == "mp1"
-            assert cap1.plugin == "plugin1"
-            assert cap1.path == "skills/skill-one.md"
-            assert cap1.triggers == ["trigger1"]
-
-            # Verify second capability
-            cap2 = loaded[1]
-            assert cap2.name == "agent-two"
-            assert cap2.kind == "agent"
-            assert cap2.triggers == ["trigger2", "trigger3"]
-
-            print("✓ Save and load capability index works correctly")
-
-        finally:
-            # Restore original path
-            cli_module.CAPABILITY_INDEX = original_path
-
-
-def test_empty_index_handling():
+    # Save
+    save_capability_index(capabilities)
+    assert index_path.exists(), "Index file should be created"
+
+    # Verify JSON structure
+    data = json.loads(index_path.read_bytes())
+
+    assert "capabilities" in data
+    assert "metadata" in data
+    assert data["metadata"]["total_count"] == 2
+    assert data["metadata"]["skills"] == 1
+    assert data["metadata"]["agents"] == 1
+    assert len(data["capabilities"]) == 2
+
+    # Load
+    loaded = load_capability_index()
+    assert len(loaded) == 2, "Should load all capabilities"
+
+    # Verify first capability
+    cap1 = loaded[0]
+    assert cap1.name == "skill-one"
+    assert cap1.kind == "skill"
+    assert cap1.description == "First test skill"
+    assert cap1.marketplace == "mp1"
+    assert cap1.plugin == "plugin1"
+    assert cap1.path == "skills/skill-one.md"
+    assert cap1.triggers == ["trigger1"]
+
+    # Verify second capability
+    cap2 = loaded[1]
+    assert cap2.name == "agent-two"
+    assert cap2.kind == "agent"
+    assert cap2.triggers == ["trigger2", "trigger3"]
+
+
+def test_empty_index_handling(index_path):
     """Test handling of missing or empty index."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        index_path = Path(tmpdir) / "nonexistent_index.json"
-
-        # Monkey-patch CAPABILITY_INDEX
-        import librarian.cli as cli_module
-        original_path = cli_module.CAPABILITY_INDEX
-        cli_module.CAPABILITY_INDEX = index_path
-
-        try:
-            # Load from non-existent file
-            loaded = load_capability_index()
-            assert loaded == [], "Should return empty list for missing index"
-
-            print("✓ Empty index handling works correctly")
-
-        finally:
-            cli_module.CAPABILITY_INDEX = original_path
-
-
-def test_malformed_index_handling():
-    """Test handling of malformed index file."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        index_path = Path(tmpdir) / "malformed_index.json"
-
-        # Create malformed JSON
-        with open(index_path, "w") as fh:
-            fh.write("{ invalid json")
-
-        # Monkey-patch CAPABILITY_INDEX
-        import librarian.cli as cli_module
-        original_path = cli_module.CAPABILITY_INDEX
-        cli_module.CAPABILITY_INDEX = index_path
-
-        try:
-            # Should handle gracefully
-            loaded = load_capability_index()
-            assert loaded == [], "Should return empty list for malformed index"
-
-            print("✓ Malformed index handling works correctly")
-
-        finally:
-            cli_module.CAPABILITY_INDEX = original_path
-
-
-def test_query_variations():
+    # Load from non-existent file
+    loaded = load_capability_index()
+    assert loaded == [], "Should return empty list for missing index"
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_malformed_index_handling(index_path, monkeypatch, use_orjson):
+    """Test handling of malformed index file with either JSON backend."""
+    if use_orjson and core.orjson is None:
+        pytest.skip("orjson not installed")
+    if not use_orjson:
+        monkeypatch.setattr(core, "orjson", None)
+
+    # Create malformed JSON
+    index_path.write_text("{ invalid json")
+
+    # Should handle gracefully
+    loaded = load_capability_index()
+    assert loaded == [], "Should return empty list for malformed index"
+
+
+@pytest.mark.parametrize("query,should_match,description", [
+    ("pdf", True, "Should match name"),
+    ("PDF", True, "Should be case-insensitive"),
+    ("pdf tools", True, "Should match name and description"),
+    ("reading pdf", True, "Should match description words"),
+    ("create pdf", True, "Should match trigger"),
+    ("documents", True, "Should match description word"),
+    ("database", False, "Should not match unrelated term"),
+])
+def test_query_variations(pdf_cap, query, should_match, description):
     """Test various query patterns."""
-    cap = Capability(
-        name="pdf-tools",
-        kind="skill",
-        description="Tools for reading, writing, and editing PDF documents",
-        marketplace="test",
-        plugin="test",
-        path="skills/pdf-tools.md",
-        triggers=["create pdf", "edit pdf"],
-    )
-
-    test_cases = [
-        ("pdf", True, "Should match name"),
-        ("PDF", True, "Should be case-insensitive"),
-        ("pdf tools", True, "Should match name and description"),
-        ("reading pdf", True, "Should match description words"),
-        ("create pdf", True, "Should match trigger"),
-        ("documents", True, "Should match description word"),
-        ("database", False, "Should not match unrelated term"),
-    ]
-
-    for query, should_match, description in test_cases:
-        matches, score = cap.matches(query)
-        if should_match:
-            assert matches, f"{description}: query='{query}'"
-            assert score > 0, f"Should have positive score: query='{query}'"
-        else:
-            assert not matches or score == 0, f"{description}: query='{query}'"
+    matches, score = pdf_cap.matches(query)
+    if should_match:
+        assert matches, f"{description}: query='{query}'"
+        assert score > 0, f"Should have positive score: query='{query}'"
+    else:
+        assert not matches or score == 0, f"{description}: query='{query}'"
 
-    print("✓ Query variations work correctly")
 
-
-def test_score_ordering():
+def test_score_ordering(spreadsheet_cap):
     """Test that scoring accounts for multiple matches."""
-    cap = Capability(
-        name="spreadsheet",
-        kind="skill",
-        description="Work with CSV files and Excel documents",
-        marketplace="test",
-        plugin="test",
-        path="skills/spreadsheet.md",
-    )
+    cap = spreadsheet_cap
 
     # Query that matches name only (substring)
     matches1, score1 = cap.matches("spreadsheet")  # 10 (name)
@@ -290,18 +263,6 @@ def test_score_ordering():
     assert score3 > score4, "Description match should score higher than no match"
     assert score4 == 0, "No match should have zero score"
 
-    print("✓ Score ordering works correctly")
-
 
 if __name__ == "__main__":
-    print("Running semantic search tests...\n")
-
-    test_capability_matching()
-    test_ranking_by_relevance()
-    test_save_and_load_capability_index()
-    test_empty_index_handling()
-    test_malformed_index_handling()
-    test_query_variations()
-    test_score_ordering()
-
-    print("\n✓ All semantic search tests passed!")
+    sys.exit(pytest.main([__file__, "-v"]))